@@ -1,30 +1,75 @@
 from dataclasses import dataclass, field
-from typing import cast
-import openai
-from openai.types import ChatModel
+from typing import TYPE_CHECKING, cast
 from dotenv import load_dotenv
-from mcp import ClientSession
-import json
-from mcp.client.stdio import stdio_client
-from mcp import ClientSession, StdioServerParameters
 import logging
 import traceback
 import os
-import json
+import time
+import asyncio
+import uuid
+import fast_json
+import tracing
+import metrics
+from conversation_store import create_store
+from llm_gateway import create_gateway
+from prefetch import TurnPrefetcher
+from tool_result_format import TOOL_RESULT_FORMAT, format_tool_result, count_tokens, load_encoding, tokens_are_exact
+
+# openai and the MCP client are imported on first use (or by warm_up()), so
+# importing this module -- and starting the API -- does not wait for them
+if TYPE_CHECKING:
+    from mcp import ClientSession
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-server_params = StdioServerParameters(
-    command="python", 
-    args=["./mcp_server.py"],  
-    env=None, 
-)
+# How tools are reached (tool_transport.py):
+# - "stdio"      spawn mcp_server.py per turn (default)
+# - "inprocess"  run the tools directly in this process
+# - "http"       pooled sessions to tool servers run with `mcp_server.py --transport streamable-http`
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio").lower()
+MCP_SERVER_URLS = [u.strip() for u in os.getenv("MCP_SERVER_URLS", "http://127.0.0.1:8100/mcp").split(",") if u.strip()]
+MCP_HTTP_POOL_SIZE = int(os.getenv("MCP_HTTP_POOL_SIZE", "4"))
+
+server_params = None  # StdioServerParameters for the stdio tool server, see stdio_server_params()
+
+def stdio_server_params():
+    global server_params
+    if server_params is None:
+        from mcp import StdioServerParameters
+        server_params = StdioServerParameters(
+            command="python", 
+            args=["./mcp_server.py"],  
+            env=None, 
+        )
+    return server_params
+
+def stdio_client(params):
+    from mcp.client.stdio import stdio_client as mcp_stdio_client
+    return mcp_stdio_client(params)
+
+def warm_up():
+    """Import the LLM client and the MCP_TRANSPORT client ahead of the first turn (e.g. in a background thread)."""
+    llm_gateway.warm_up()
+    # Counted on every tool result; loading it can read or download a file
+    if not load_encoding():
+        logger.warning("tiktoken encoding unavailable: tool result token counts are estimated (4 characters per token)")
+    if MCP_TRANSPORT == "inprocess":
+        import tool_transport
+        import mcp_server  # the tools and the database layer
+    elif MCP_TRANSPORT == "http":
+        import tool_transport
+        import mcp.client.streamable_http
+    else:
+        import mcp.client.stdio
+        stdio_server_params()
 
 
 load_dotenv()
 
-openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"),base_url=os.getenv("OPENAI_BASE_URL"))
+# Completions go through the gateway: pooled connections, retries, failover across
+# OPENAI_BASE_URLS and optional hedging (llm_gateway.py)
+llm_gateway = create_gateway()
 
 def load_prompt(path):
     with open(path, "r") as f:
@@ -32,15 +77,168 @@ def load_prompt(path):
 
 PROMPT_PATH = "reservation_agent_prompt.md"
 
+# make_reservation_tool errors that mean "lost the race / slot taken" rather than a failure
+RESERVATION_CONFLICT_ERRORS = ("Not enough free tables", "No contiguous tables available", "Conflict detected")
+
+def record_tool_outcome(tool_name: str, raw_text: str):
+    """Count a tool call by its `success` flag; classify booking attempts as success / conflict / error."""
+    try:
+        payload = fast_json.loads(raw_text)
+    except ValueError:
+        payload = {}
+    success = isinstance(payload, dict) and bool(payload.get("success"))
+    metrics.TOOL_CALLS.inc(tool=tool_name, outcome="success" if success else "failure")
+
+    if tool_name == "make_reservation_tool":
+        error = str(payload.get("error", "")) if isinstance(payload, dict) else ""
+        if success:
+            outcome = "success"
+        elif error.startswith(RESERVATION_CONFLICT_ERRORS):
+            outcome = "conflict"
+        else:
+            outcome = "error"
+        metrics.RESERVATION_ATTEMPTS.inc(outcome=outcome)
+
+def record_tool_result_tokens(tool_name: str, raw_text: str, content: str):
+    """Log and count the tokens of a tool result before and after TOOL_RESULT_FORMAT encoding."""
+    original, sent = count_tokens(raw_text), count_tokens(content)
+    metrics.LLM_TOOL_RESULT_TOKENS.inc(original, tool=tool_name, form="original")
+    metrics.LLM_TOOL_RESULT_TOKENS.inc(sent, tool=tool_name, form="sent")
+    estimated = "" if tokens_are_exact() else ", estimated at 4 characters per token"
+    logger.info(f"Tool result {tool_name}: {original} -> {sent} tokens ({TOOL_RESULT_FORMAT}{estimated})")
+
+# ----- Per-turn budget -----
+# Caps on one user message; 0 disables a cap.
+LLM_MAX_HOPS = int(os.getenv("LLM_MAX_HOPS", "8"))                      # chat.completions calls
+LLM_MAX_TOOL_CALLS = int(os.getenv("LLM_MAX_TOOL_CALLS", "16"))         # MCP tool executions
+LLM_TURN_DEADLINE_S = float(os.getenv("LLM_TURN_DEADLINE_S", "90"))     # wall clock
+LLM_MAX_TOKENS_PER_TURN = int(os.getenv("LLM_MAX_TOKENS_PER_TURN", "0"))  # prompt + completion tokens
+
+BUDGET_WRAP_UP_NOTE = (
+    "The tool budget for this message is used up. Do not call any more tools; "
+    "answer the user with the information gathered so far and say what is still unchecked."
+)
+BUDGET_FALLBACK_RESPONSE = (
+    "Sorry, this is taking longer than expected. Here is what I have so far; "
+    "please ask again or narrow the request (area, date, time, guests)."
+)
+
+# ----- Model routing -----
+# Each LLM call ("hop") of a turn has a kind:
+#   first          the user's message, before any tool ran
+#   tool_followup  after tool results: usually just the next tool call
+#   ranking        after LLM_RANKING_TOOLS results: preference ranking (pick_best_restaurant_from_list)
+#   wrap_up        the tool-free call when the tool budget is used up
+# LLM_ROUTES maps kinds to "primary" (MODEL) or "fast" (LLM_FAST_MODEL), e.g.
+# LLM_ROUTES="tool_followup=fast,first=fast". Without LLM_FAST_MODEL every hop uses MODEL.
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "")
+LLM_ROUTES = {"first": "primary", "tool_followup": "fast", "ranking": "primary", "wrap_up": "primary"}
+LLM_ROUTES.update(
+    (kind.strip(), route.strip())
+    for kind, _, route in (item.partition("=") for item in os.getenv("LLM_ROUTES", "").split(",") if "=" in item)
+)
+LLM_RANKING_TOOLS = {t.strip() for t in os.getenv("LLM_RANKING_TOOLS", "latest_5_user_feedback").split(",") if t.strip()}
+# A fast hop that answers the user instead of calling a tool is asked again on the primary model
+LLM_ESCALATE_FINAL = os.getenv("LLM_ESCALATE_FINAL", "1").lower() not in ("0", "false", "no", "off")
+# Optional USD per 1K tokens, for llm_cost_usd_total: {"model": [prompt, completion], ...}
+LLM_PRICES = fast_json.loads(os.getenv("LLM_PRICES", "{}"))
+
+def route_for(hop: str) -> str:
+    if not LLM_FAST_MODEL:
+        return "primary"
+    return LLM_ROUTES.get(hop, "primary")
+
+def model_for(route: str) -> str:
+    return LLM_FAST_MODEL if route == "fast" else os.getenv("MODEL")
+
+@dataclass
+class TurnBudget:
+    """Tracks LLM hops, tool calls, elapsed time and tokens spent on one chat turn."""
+    max_hops: int = LLM_MAX_HOPS
+    max_tool_calls: int = LLM_MAX_TOOL_CALLS
+    deadline_s: float = LLM_TURN_DEADLINE_S
+    max_tokens: int = LLM_MAX_TOKENS_PER_TURN
+    hops: int = 0
+    tool_calls: int = 0
+    tokens: int = 0
+    started: float = field(default_factory=time.monotonic)
+    exhausted: str = None
+
+    def remaining_s(self):
+        if not self.deadline_s:
+            return None
+        return self.deadline_s - (time.monotonic() - self.started)
+
+    def hard_limit(self):
+        """Name of a budget that forbids any further LLM call, else None."""
+        remaining = self.remaining_s()
+        if remaining is not None and remaining <= 0:
+            return "deadline"
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            return "tokens"
+        if self.max_hops and self.hops >= self.max_hops:
+            return "hops"
+        return None
+
+    def tools_exhausted(self):
+        """Name of a budget that forbids running another tool, else None."""
+        remaining = self.remaining_s()
+        if remaining is not None and remaining <= 0:
+            return "deadline"
+        if self.max_tool_calls and self.tool_calls >= self.max_tool_calls:
+            return "tool_calls"
+        if self.max_hops and self.hops >= self.max_hops:
+            return "hops"  # no LLM call left to read the result
+        return None
+
+    def must_wrap_up(self):
+        """Name of a budget that only leaves room for a final tool-free LLM call, else None."""
+        if self.max_hops and self.hops >= self.max_hops - 1:
+            return "hops"
+        return self.tools_exhausted()
+
+    def hit(self, budget: str):
+        """Record the first budget that ran out on this turn."""
+        if self.exhausted is None:
+            self.exhausted = budget
+            metrics.LLM_BUDGET_EXHAUSTED.inc(budget=budget)
+            logger.warning(f"Turn budget exhausted ({budget}): hops={self.hops} tool_calls={self.tool_calls} "
+                           f"tokens={self.tokens} elapsed={time.monotonic() - self.started:.1f}s")
+
+_SYSTEM_PROMPT = None
+
+def system_prompt() -> str:
+    """The agent prompt, read from disk once per process."""
+    global _SYSTEM_PROMPT
+    if _SYSTEM_PROMPT is None:
+        _SYSTEM_PROMPT = load_prompt(PROMPT_PATH)
+    return _SYSTEM_PROMPT
+
 @dataclass
 class ReservationAgent():
     user_id : int = 1
-    messages: list[ChatModel] = field(default_factory=list)
+    messages: list[dict] = field(default_factory=list)
     MAX_MEMORY: int = 10
+    conversation_id: str = "default"
   
     def __post_init__(self):
-        system_prompt = load_prompt(PROMPT_PATH)
-        self.messages.append({"role": "system", "content": system_prompt})
+        self.messages.insert(0, {"role": "system", "content": system_prompt()})
+
+    def to_state(self) -> dict:
+        """Serializable conversation state (the system prompt is re-added on load)."""
+        return {
+            "user_id": self.user_id,
+            "messages": [msg for msg in self.messages if msg["role"] != "system"],
+        }
+
+    @classmethod
+    def from_state(cls, conversation_id: str, state: dict = None) -> "ReservationAgent":
+        state = state or {}
+        return cls(
+            user_id=state.get("user_id", 1),
+            messages=list(state.get("messages", [])),
+            conversation_id=conversation_id,
+        )
 
     def chat_history(self):
         system_msg = [msg for msg in self.messages if msg["role"] == "system"]
@@ -48,10 +246,12 @@ class ReservationAgent():
         trimmed = user_assistant_msgs[-(self.MAX_MEMORY * 2):]  
         self.messages = system_msg + trimmed
     
-    async def process_query(self, session: ClientSession, query: str) -> dict:
+    @tracing.traced("agent.process_query")
+    async def process_query(self, session: "ClientSession", query: str) -> dict:
         try:
             # Get available tools from MCP server
-            response = await session.list_tools()
+            with tracing.span("mcp.list_tools"):
+                response = await session.list_tools()
             available_tools = [
                 {
                     "type": "function",
@@ -67,15 +267,15 @@ class ReservationAgent():
             logger.error(f"Error fetching tools: {e}")
             return {"error": "Failed to fetch tools from backend."}
     
+        budget = TurnBudget()
+        prefetcher = TurnPrefetcher(session)
         try:
             # Send user query to LLM with tool schemas
             self.messages.append({"role": "user", "content": f"user_id : {self.user_id}, query : {query}"})
 
-            res = await openai_client.chat.completions.create(
-                model=os.getenv("MODEL"),
-                messages=self.messages,
-                tools=available_tools,
-            )
+            res = await self._complete(available_tools, budget, hop="first")
+            if res is None:
+                return self._budget_fallback(budget)
             self.messages.append({"role": "assistant", "content": res.choices[0].message.content})
 
             # Handle possible tool calls
@@ -84,33 +284,67 @@ class ReservationAgent():
                 
                 # If model wants to call a tool
                 if hasattr(choice, "tool_calls") and choice.tool_calls:
+                    batch_size = len(choice.tool_calls)
                     for tool_call in choice.tool_calls:
                         tool_name = tool_call.function.name
-                        tool_args = json.loads(tool_call.function.arguments)
+
+                        # Every tool_call_id needs a tool message, so skipped calls get an error result
+                        if budget.tools_exhausted():
+                            budget.hit(budget.tools_exhausted())
+                            self.messages.append({
+                                "role": "tool",
+                                "tool_call_id": tool_call.id,
+                                "name": tool_name,
+                                "content": fast_json.dumps({"success": False, "error": "Skipped: tool budget for this message is used up"}),
+                            })
+                            continue
+
+                        tool_args = fast_json.loads(tool_call.function.arguments)
 
                         cleaned_args = {}
                         for key, value in tool_args.items():
                             if value not in [None, "Unknown", "null", "None", ""]:
                                 cleaned_args[key] = value
 
-                        # Run tool via MCP
-                        result = await session.call_tool(tool_name, cast(dict, cleaned_args))
+                        # Run tool via MCP (trace context travels in the request _meta), or take the prefetched call
+                        with tracing.span("mcp.call_tool", tool=tool_name), metrics.TOOL_CALL_DURATION.time(tool=tool_name):
+                            result = await prefetcher.call_tool(tool_name, cast(dict, cleaned_args))
+                        budget.tool_calls += 1
                         raw_text = result.content[0].text if result.content else "{}"
+                        record_tool_outcome(tool_name, raw_text)
+                        # Start what the flow will likely ask for next, while the LLM works out its next step
+                        prefetcher.observe(tool_name, cleaned_args, raw_text, batch_size)
 
-                        # Append tool result for the model to read
+                        # Append tool result for the model to read, in the configured encoding
+                        content = format_tool_result(tool_name, raw_text)
+                        record_tool_result_tokens(tool_name, raw_text, content)
                         self.messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
                             "name": tool_name,
-                            "content": raw_text
+                            "content": content
                         })
+
+                    # Out of tool budget → one last call without tools so the model answers with what it has
+                    if budget.must_wrap_up():
+                        budget.hit(budget.must_wrap_up())
+                        note = {"role": "system", "content": BUDGET_WRAP_UP_NOTE}
+                        self.messages.append(note)
+                        try:
+                            res = await self._complete(None, budget, hop="wrap_up")
+                        finally:
+                            self.messages.remove(note)  # chat_history() would keep it for later turns
+                        if res is None or not res.choices[0].message.content:
+                            return self._budget_fallback(budget)
+                        self.messages.append({"role": "assistant", "content": res.choices[0].message.content})
+                        break
     
-                    # After appending tool result → call model again (NO tools passed here)
-                    res = await openai_client.chat.completions.create(
-                        model=os.getenv("MODEL"),
-                        messages=self.messages,
-                        tools=available_tools,
-                    )
+                    # After appending tool result → call model again
+                    called = {tool_call.function.name for tool_call in choice.tool_calls}
+                    hop = "ranking" if called & LLM_RANKING_TOOLS else "tool_followup"
+                    res = await self._complete(available_tools, budget, hop=hop)
+                    if res is None:
+                        return self._budget_fallback(budget)
 
                     self.messages.append({"role": "assistant", "content": res.choices[0].message.content})
                     continue  # Continue loop: model may call another tool
@@ -119,20 +353,127 @@ class ReservationAgent():
 
             self.chat_history()
     
-            return {
+            result = {
                 "response": res.choices[0].message.content,
                 "context": self.messages,
             }
+            if budget.exhausted:
+                result["budget_exhausted"] = budget.exhausted
+            return result
     
         except Exception as e:
             logger.error(f"Error processing query: {e}")
             logger.error(traceback.format_exc())
             return {"error": "Failed to process query."}
 
-    async def run_query(self, query: str) -> dict:
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await self.process_query(session, query)
+        finally:
+            prefetcher.close()
+            metrics.LLM_ROUND_TRIPS_PER_TURN.observe(budget.hops)
+
+    def _budget_fallback(self, budget: TurnBudget) -> dict:
+        """Reply used when the turn has no budget left for another LLM call."""
+        self.messages.append({"role": "assistant", "content": BUDGET_FALLBACK_RESPONSE})
+        self.chat_history()
+        return {
+            "response": BUDGET_FALLBACK_RESPONSE,
+            "context": self.messages,
+            "budget_exhausted": budget.exhausted,
+        }
+
+    async def _complete(self, available_tools, budget: TurnBudget, hop: str = "first"):
+        """
+        One chat.completions round trip within `budget` on the model routed for `hop`;
+        None if the budget is spent. A fast hop that answers the user is escalated.
+        """
+        route = route_for(hop)
+        res = await self._call_model(available_tools, budget, route)
+        if res is None or route != "fast" or not LLM_ESCALATE_FINAL or res.choices[0].message.tool_calls:
+            return res
+        # The fast model wants to reply to the user; the primary model writes that reply
+        metrics.LLM_ROUTE_ESCALATIONS.inc(hop=hop)
+        return await self._call_model(available_tools, budget, "primary") or res
+
+    async def _call_model(self, available_tools, budget: TurnBudget, route: str):
+        limit = budget.hard_limit()
+        if limit:
+            budget.hit(limit)
+            return None
+        model = model_for(route)
+        kwargs = {"tools": available_tools} if available_tools else {}
+        budget.hops += 1
+        try:
+            with tracing.span("llm.completion", model=model, route=route) as s, \
+                    metrics.LLM_COMPLETION_DURATION.time(model=model), metrics.LLM_ROUTE_DURATION.time(route=route):
+                res = await asyncio.wait_for(
+                    llm_gateway.create(model=model, messages=self.messages, **kwargs),
+                    timeout=budget.remaining_s(),
+                )
+        except asyncio.TimeoutError:
+            budget.hit("deadline")
+            return None
+        if res.usage is not None:
+            budget.tokens += res.usage.prompt_tokens + res.usage.completion_tokens
+            metrics.LLM_TOKENS.inc(res.usage.prompt_tokens, model=model, type="prompt")
+            metrics.LLM_TOKENS.inc(res.usage.completion_tokens, model=model, type="completion")
+            price = LLM_PRICES.get(model)
+            if price:
+                cost = (res.usage.prompt_tokens * price[0] + res.usage.completion_tokens * price[1]) / 1000
+                metrics.LLM_COST.inc(cost, route=route, model=model)
+            if s is not None:
+                s.set(prompt_tokens=res.usage.prompt_tokens, completion_tokens=res.usage.completion_tokens)
+        return res
+
+    async def run_query(self, query: str, request_id: str = None) -> dict:
+        tracing.set_request_id(request_id)
+        metrics.touch_conversation(self.conversation_id)
+        metrics.CHAT_TURNS_IN_PROGRESS.inc()
+        try:
+            return await self._run_query(query)
+        finally:
+            metrics.CHAT_TURNS_IN_PROGRESS.dec()
+
+    async def _run_query(self, query: str) -> dict:
+        with tracing.span("agent.run_query"):
+            if MCP_TRANSPORT == "inprocess":
+                from tool_transport import get_in_process_session
+                return await self.process_query(get_in_process_session(), query)
+            if MCP_TRANSPORT == "http":
+                from tool_transport import get_http_session
+                return await self.process_query(get_http_session(MCP_SERVER_URLS, MCP_HTTP_POOL_SIZE), query)
+            from mcp import ClientSession
+            async with stdio_client(stdio_server_params()) as (read, write):
+                async with ClientSession(read, write) as session:
+                    with tracing.span("mcp.initialize"):
+                        await session.initialize()
+                    return await self.process_query(session, query)
+
+# ----- Conversations -----
+# State lives in the conversation store (conversation_store.py), not in this process,
+# so any API worker can serve any turn. Turns of one conversation are serialized
+# within a worker; across workers the last turn to finish wins.
+conversation_store = create_store()
+# conversation_id -> (lock, turns holding or waiting for it); dropped when unused
+_CONVERSATION_LOCKS = {}
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
 
-ai_agent = ReservationAgent()
\ No newline at end of file
+async def run_conversation_turn(conversation_id: str, query: str, request_id: str = None) -> dict:
+    """Load the conversation, run one turn, save it back. The result carries the conversation_id."""
+    lock, users = _CONVERSATION_LOCKS.get(conversation_id, (None, 0))
+    lock = lock or asyncio.Lock()
+    _CONVERSATION_LOCKS[conversation_id] = (lock, users + 1)
+    try:
+        async with lock:
+            state = await asyncio.to_thread(conversation_store.load, conversation_id)
+            agent = ReservationAgent.from_state(conversation_id, state)
+            result = await agent.run_query(query, request_id=request_id)
+            await asyncio.to_thread(conversation_store.save, conversation_id, agent.to_state())
+    finally:
+        lock, users = _CONVERSATION_LOCKS[conversation_id]
+        if users == 1:
+            del _CONVERSATION_LOCKS[conversation_id]
+        else:
+            _CONVERSATION_LOCKS[conversation_id] = (lock, users - 1)
+    result["conversation_id"] = conversation_id
+    return result
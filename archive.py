@@ -0,0 +1,135 @@
+# archive.py
+"""
+Retention job: move completed bookings out of the live tables.
+
+Availability checks probe the live `reservations` table, so it should only hold
+current and upcoming rows. This job moves everything that finished more than
+N days ago into the archive tables (see models.ArchivedBooking / ArchivedReservation),
+where the live id is kept as `source_id` next to the archive row's own id:
+
+- Reservations whose window ended before the cutoff -> reservations_archive.
+- Bookings that ended before the cutoff -> bookings_archive, EXCEPT bookings
+  referenced by feedback. Those stay in `bookings` (marked "completed") so
+  feedbacks.booking_id keeps pointing at a live row. Only reservations are on the
+  availability hot path, so the bookings kept live do not slow it down.
+
+Rows are moved in batches with INSERT ... SELECT + DELETE, one transaction per
+batch, so the job can run next to live traffic.
+
+Run (e.g. nightly from cron):
+    python archive.py --days 30
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from sqlalchemy import select, insert, delete, update, literal, exists
+from database import SessionLocal
+from models import Booking, Reservation, Feedback, ArchivedBooking, ArchivedReservation
+
+# IST timezone
+IST = timezone(timedelta(hours=5, minutes=30))
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_BATCH_SIZE = 5000
+
+
+def now_ist():
+    return datetime.now(IST)
+
+
+def _archive_reservations(db, cutoff: datetime, archived_at: datetime, batch_size: int) -> int:
+    R = Reservation
+    moved = 0
+    while True:
+        # Oldest first, so the range scan on ix_reservation_end also yields the batch order
+        ids = db.execute(
+            select(R.id).where(R.end_dt < cutoff).order_by(R.end_dt, R.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        db.execute(
+            insert(ArchivedReservation).from_select(
+                ["source_id", "booking_id", "table_id", "start_dt", "end_dt", "created_at", "archived_at"],
+                select(R.id, R.booking_id, R.table_id, R.start_dt, R.end_dt, R.created_at, literal(archived_at))
+                .where(R.id.in_(ids)),
+            )
+        )
+        db.execute(delete(R).where(R.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+
+
+def _archive_bookings(db, cutoff: datetime, archived_at: datetime, batch_size: int) -> int:
+    B = Booking
+    has_feedback = exists().where(Feedback.booking_id == B.id)
+    has_live_reservation = exists().where(Reservation.booking_id == B.id)
+    moved = 0
+    while True:
+        ids = db.execute(
+            select(B.id)
+            .where(B.end_dt < cutoff)
+            .where(~has_feedback)
+            .where(~has_live_reservation)
+            .order_by(B.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        db.execute(
+            insert(ArchivedBooking).from_select(
+                ["source_id", "user_id", "restaurant_id", "start_dt", "end_dt", "guests", "status", "created_at", "archived_at"],
+                select(B.id, B.user_id, B.restaurant_id, B.start_dt, B.end_dt, B.guests,
+                       literal("completed"), B.created_at, literal(archived_at))
+                .where(B.id.in_(ids)),
+            )
+        )
+        db.execute(delete(B).where(B.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+
+
+def archive_completed_bookings(
+    db,
+    older_than_days: int = DEFAULT_RETENTION_DAYS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Move bookings/reservations that ended more than `older_than_days` ago to the archive tables.
+
+    Returns:
+        { reservations_archived, bookings_archived, bookings_kept_for_feedback }
+    """
+    cutoff = now_ist() - timedelta(days=older_than_days)
+    archived_at = now_ist()
+
+    reservations_archived = _archive_reservations(db, cutoff, archived_at, batch_size)
+    bookings_archived = _archive_bookings(db, cutoff, archived_at, batch_size)
+
+    # Whatever finished before the cutoff and is still live is kept for its feedback
+    kept = db.execute(
+        update(Booking)
+        .where(Booking.end_dt < cutoff)
+        .where(Booking.status != "completed")
+        .values(status="completed")
+    ).rowcount
+    db.commit()
+
+    return {
+        "reservations_archived": reservations_archived,
+        "bookings_archived": bookings_archived,
+        "bookings_kept_for_feedback": kept,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive completed bookings older than N days.")
+    parser.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS, help="retention window in days")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(archive_completed_bookings(db, args.days, args.batch_size))
+    finally:
+        db.close()
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the reservation backend.
+
+Run from the repository root so the flat modules (database, models, mcp_server)
+are importable, e.g.:
+
+    python -m benchmarks.availability
+"""
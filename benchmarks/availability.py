@@ -0,0 +1,161 @@
+"""
+Availability probe benchmark + query plan check.
+
+Grows the bookings history in steps (mostly past bookings, a thin layer of
+upcoming ones) and after every step:
+- prints the EXPLAIN plan of the exact SQL `get_available_tables` emits
+  (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL)
+- times `get_available_tables` for an upcoming evening slot
+
+Latency should stay flat as history grows, since the overlap probe seeks on
+ix_reservation_table_window and never visits reservations that already ended.
+
+Run:
+    python -m benchmarks.availability --sizes 10000,100000,1000000
+    python -m benchmarks.availability --database-url postgresql://user:pw@localhost/bench
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+IST = timezone(timedelta(hours=5, minutes=30))
+CHUNK = 50_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated booking counts")
+    parser.add_argument("--restaurants", type=int, default=50)
+    parser.add_argument("--tables", type=int, default=10, help="tables per restaurant")
+    parser.add_argument("--repeat", type=int, default=200, help="probes per size")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def explain(engine, statement, params):
+    """Return the plan lines for a captured statement."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).fetchall()
+            return [row[-1] for row in rows]
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", params).fetchall()
+        return [row[0] for row in rows]
+
+
+def main():
+    args = parse_args()
+    db_file = None
+    if args.database_url is None:
+        db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.database_url = f"sqlite:///{db_file}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import event, insert
+    from database import SessionLocal, engine
+    from models import Base, Restaurant, RestaurantTable, User, Booking, Reservation
+    from mcp_server import get_available_tables
+
+    rng = random.Random(args.seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    now = datetime.now(IST).replace(minute=0, second=0, microsecond=0)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": 1, "name": "Bench", "phone": "0000000000"}])
+        conn.execute(insert(Restaurant.__table__), [
+            {"id": rid, "name": f"Bench {rid}", "area": "Bench", "latitude": 13.0, "longitude": 80.2}
+            for rid in range(1, args.restaurants + 1)
+        ])
+        conn.execute(insert(RestaurantTable.__table__), [
+            {"id": (rid - 1) * args.tables + tno, "restaurant_id": rid, "table_no": tno, "seats": 6}
+            for rid in range(1, args.restaurants + 1)
+            for tno in range(1, args.tables + 1)
+        ])
+
+    def booking_rows(start_id, count):
+        bookings, reservations = [], []
+        for bid in range(start_id, start_id + count):
+            rid = rng.randint(1, args.restaurants)
+            # ~99% history (up to two years back), ~1% in the next two weeks
+            if rng.random() < 0.99:
+                start = now - timedelta(days=rng.randint(1, 730), hours=rng.randint(0, 12))
+            else:
+                start = now + timedelta(days=rng.randint(0, 14), hours=rng.randint(0, 12))
+            bookings.append({
+                "id": bid, "user_id": 1, "restaurant_id": rid,
+                "start_dt": start, "end_dt": start + timedelta(hours=2),
+                "guests": 4, "status": "confirmed",
+            })
+            reservations.append({
+                "id": bid, "booking_id": bid,
+                "table_id": (rid - 1) * args.tables + rng.randint(1, args.tables),
+                "start_dt": start, "end_dt": start + timedelta(hours=2),
+            })
+        return bookings, reservations
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "restaurant_tables" in statement and not executemany:
+            captured.append((statement, parameters))
+
+    slot_start = (now + timedelta(days=1)).replace(hour=19)
+    slot_end = slot_start + timedelta(hours=2)
+    report = {"database": engine.dialect.name, "results": []}
+    loaded = 0
+
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        while loaded < size:
+            count = min(CHUNK, size - loaded)
+            bookings, reservations = booking_rows(loaded + 1, count)
+            with engine.begin() as conn:
+                conn.execute(insert(Booking.__table__), bookings)
+                conn.execute(insert(Reservation.__table__), reservations)
+            loaded += count
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
+
+        db = SessionLocal()
+        try:
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            get_available_tables(db, 1, slot_start, slot_end)
+            event.remove(engine, "before_cursor_execute", capture)
+            plan = explain(engine, *captured[-1])
+
+            timings = []
+            for _ in range(args.repeat):
+                rid = rng.randint(1, args.restaurants)
+                t0 = time.perf_counter()
+                get_available_tables(db, rid, slot_start, slot_end)
+                timings.append((time.perf_counter() - t0) * 1000)
+        finally:
+            db.close()
+
+        timings.sort()
+        result = {
+            "bookings": loaded,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+            "plan": plan,
+        }
+        report["results"].append(result)
+        print(f"bookings={loaded:>9}  p50={result['p50_ms']}ms  p95={result['p95_ms']}ms", file=sys.stderr)
+        for line in plan:
+            print(f"    {line}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+    if db_file:
+        os.unlink(db_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+End-to-end load test for /chat/send against a scripted mock LLM.
+
+- Starts benchmarks.mock_llm on loopback and points OPENAI_BASE_URL at it.
+- Builds a dataset with generate_data.py (or reuses --database-url with --reuse).
+- Drives /chat/send with --users concurrent virtual users, each sending --turns
+  messages back to back, in-process through httpx's ASGI transport (or against a
+  running server with --api-url).
+- Reports end-to-end latency percentiles and throughput, plus where the time of
+  an average turn goes:
+    mcp_spawn   starting the stdio MCP server and initialize() (none with MCP_TRANSPORT=inprocess)
+    list_tools  tools/list round trip
+    tool_exec   session.call_tool round trips (JSON-RPC + tool execution)
+    llm_wait    chat.completions.create round trips to the mock
+    other       everything else: JSON (de)serialization, message bookkeeping, HTTP
+
+The breakdown wraps the client-side calls in this process, so it is only
+collected in-process (not with --api-url).
+
+Run:
+    python -m benchmarks.chat_load --users 20 --turns 5 --llm-latency-ms 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from benchmarks.common import summarize, run_metadata, use_database
+from benchmarks.mock_llm import ScriptedLLM, serve_in_thread
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--turns", type=int, default=3, help="messages per virtual user")
+    parser.add_argument("--flow", choices=["area_search", "availability"], default="area_search")
+    parser.add_argument("--fan-out", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="fraction of completions with --llm-slow-ms extra")
+    parser.add_argument("--llm-slow-ms", type=float, default=0.0)
+    parser.add_argument("--llm-fail-rate", type=float, default=0.0, help="fraction of completions answered with 503")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--api-url", default=None, help="drive a running API instead of the in-process app")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+class Breakdown:
+    """Accumulates wall time per category across all turns."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, category: str, seconds: float):
+        self.totals[category] += seconds
+        self.counts[category] += 1
+
+    def timed(self, category: str, fn):
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(category, time.perf_counter() - t0)
+        return wrapper
+
+    def per_turn(self, turns: int, e2e_total_s: float) -> dict:
+        out = {k: round(v / turns * 1000, 3) for k, v in self.totals.items()}
+        out["other"] = round(max(0.0, e2e_total_s - sum(self.totals.values())) / turns * 1000, 3)
+        out["calls_per_turn"] = {k: round(v / turns, 2) for k, v in self.counts.items()}
+        return out
+
+
+def instrument(breakdown: Breakdown):
+    """Wrap the agent's MCP/LLM calls so their time is attributed per category."""
+    import ai_client
+    from mcp import ClientSession, StdioServerParameters
+    from tool_transport import InProcessToolSession
+
+    # The stdio server only inherits a minimal environment; pass the benchmark DB through
+    ai_client.server_params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(REPO_ROOT, "mcp_server.py")], env=dict(os.environ),
+    )
+
+    original_stdio_client = ai_client.stdio_client
+
+    @asynccontextmanager
+    async def timed_stdio_client(params):
+        t0 = time.perf_counter()
+        async with original_stdio_client(params) as streams:
+            breakdown.add("mcp_spawn", time.perf_counter() - t0)
+            yield streams
+
+    ai_client.stdio_client = timed_stdio_client
+    for session_cls in (ClientSession, InProcessToolSession):
+        session_cls.initialize = breakdown.timed("mcp_spawn", session_cls.initialize)
+        session_cls.list_tools = breakdown.timed("list_tools", session_cls.list_tools)
+        session_cls.call_tool = breakdown.timed("tool_exec", session_cls.call_tool)
+    # Whole gateway call: retries, failover and hedges included
+    ai_client.llm_gateway.create = breakdown.timed("llm_wait", ai_client.llm_gateway.create)
+
+
+async def drive(client, users: int, turns: int, flow: str):
+    timings, errors = [], 0
+    message = "Find a table for 4 in Adyar tomorrow at 7pm" if flow == "area_search" else "Is restaurant 1 free tomorrow at 7pm?"
+
+    async def virtual_user(u):
+        nonlocal errors
+        conversation_id = None  # each virtual user carries on its own conversation
+        for _ in range(turns):
+            t0 = time.perf_counter()
+            resp = await client.post("/chat/send", json={"message": message, "conversation_id": conversation_id})
+            timings.append((time.perf_counter() - t0) * 1000)
+            body = resp.json() if resp.status_code == 200 else {}
+            conversation_id = body.get("conversation_id", conversation_id)
+            if resp.status_code != 200 or "error" in body:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(virtual_user(u) for u in range(users)))
+    return timings, time.perf_counter() - t0, errors
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+    os.chdir(REPO_ROOT)  # the agent loads its prompt and spawns mcp_server.py relative to the repo
+
+    llm = ScriptedLLM(flow=args.flow, fan_out=args.fan_out, latency_ms=args.llm_latency_ms,
+                      slow_rate=args.llm_slow_rate, slow_ms=args.llm_slow_ms, fail_rate=args.llm_fail_rate)
+    mock = serve_in_thread(llm, port=args.mock_port)
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_BASE_URLS"] = f"http://127.0.0.1:{args.mock_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["MODEL"] = "mock"
+
+    from database import engine
+    from generate_data import GeneratorConfig, generate
+    from seed_data import has_seed_data
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=7, users=100))
+
+    import httpx
+
+    breakdown = Breakdown()
+    if args.api_url:
+        client = httpx.AsyncClient(base_url=args.api_url, timeout=None)
+    else:
+        instrument(breakdown)
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api", timeout=None)
+
+    async def run():
+        async with client:
+            return await drive(client, args.users, args.turns, args.flow)
+
+    timings, wall, errors = asyncio.run(run())
+    mock.should_exit = True
+
+    total_turns = len(timings)
+    report = {
+        "meta": run_metadata(
+            users=args.users, turns=args.turns, flow=args.flow,
+            llm_latency_ms=args.llm_latency_ms, llm_slow_rate=args.llm_slow_rate, llm_slow_ms=args.llm_slow_ms,
+            llm_fail_rate=args.llm_fail_rate, database=engine.dialect.name,
+            tool_result_format=os.getenv("TOOL_RESULT_FORMAT", "table"),
+        ),
+        "e2e": summarize(timings, wall),
+        "errors": errors,
+        "llm_completions": llm.completions,
+        "llm_injected_failures": llm.failures,
+        # message content only, at 4 characters per token (the mock's estimate)
+        "llm_prompt_tokens_per_turn": round(llm.prompt_tokens / max(total_turns, 1)),
+    }
+    if not args.api_url:
+        report["breakdown_ms_per_turn"] = breakdown.per_turn(total_turns, sum(timings) / 1000)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Cold start of the tool server and the API process.
+
+Cases:
+- import          `python -X importtime -c "import <module>"` for mcp_server and main, run
+                  --runs times in fresh interpreters: total import time, process wall time
+                  and the heaviest direct imports (cumulative). --importtime-dir keeps the
+                  raw -X importtime reports of the last run.
+- stdio_server    a spawned `mcp_server.py` as the agent uses it on every chat turn: time
+                  until initialize is answered, until tools/list is answered and until the
+                  first database-backed tool call (get_restaurant_details_by_id) returns
+- api_warm_up     in a fresh interpreter: `import main`, then ai_client.warm_up() (the LLM
+                  and MCP clients main.py loads in the background at startup)
+
+Run:
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --database-url sqlite:///./bench.db --reuse --importtime-dir ./importtime
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize, run_metadata, use_database
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per case")
+    parser.add_argument("--top", type=int, default=8, help="heaviest direct imports to list")
+    parser.add_argument("--importtime-dir", default=None, help="write the raw -X importtime report per module here")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+def parse_importtime(report: str):
+    """[(depth, self_us, cumulative_us, module)] from -X importtime output, in report order."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def direct_imports(rows, module: str):
+    """(module, cumulative_us) of the imports made directly by `module`."""
+    index = next(i for i, row in enumerate(rows) if row[3] == module)
+    depth = rows[index][0]
+    children = []
+    # Children are reported before their parent, one level deeper
+    for row in reversed(rows[:index]):
+        if row[0] <= depth:
+            break
+        if row[0] == depth + 1:
+            children.append((row[3], row[2]))
+    return children
+
+
+def time_import(module: str, args):
+    totals_ms, walls_ms, report = [], [], ""
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=REPO_ROOT, env=dict(os.environ), capture_output=True, text=True)
+        walls_ms.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        report = proc.stderr
+        rows = parse_importtime(report)
+        totals_ms.append(next(row[2] for row in rows if row[3] == module) / 1000)
+    if args.importtime_dir:
+        os.makedirs(args.importtime_dir, exist_ok=True)
+        with open(os.path.join(args.importtime_dir, f"{module}.txt"), "w") as f:
+            f.write(report)
+    heaviest = sorted(direct_imports(parse_importtime(report), module), key=lambda c: -c[1])[: args.top]
+    return {
+        "import": summarize(totals_ms, sum(totals_ms) / 1000),
+        "process_wall": summarize(walls_ms, sum(walls_ms) / 1000),
+        "heaviest_direct_imports_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+async def time_stdio_server(args, restaurant_id: int):
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(REPO_ROOT, "mcp_server.py")], env=dict(os.environ),
+    )
+    phases = {"initialize": [], "list_tools": [], "first_db_tool_call": []}
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                phases["initialize"].append((time.perf_counter() - t0) * 1000)
+                await session.list_tools()
+                phases["list_tools"].append((time.perf_counter() - t0) * 1000)
+                result = await session.call_tool("get_restaurant_details_by_id", {"restaurant_id": restaurant_id})
+                phases["first_db_tool_call"].append((time.perf_counter() - t0) * 1000)
+                if result.isError:
+                    raise RuntimeError(f"get_restaurant_details_by_id failed: {result.content}")
+    return {phase: summarize(values, sum(values) / 1000) for phase, values in phases.items()}
+
+
+API_WARM_UP_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+main.warm_up()
+t2 = time.perf_counter()
+print(json.dumps({"import_main_ms": (t1 - t0) * 1000, "warm_up_ms": (t2 - t1) * 1000}))
+"""
+
+
+def time_api_warm_up(args):
+    phases = {"import_main_ms": [], "warm_up_ms": []}
+    for _ in range(args.runs):
+        proc = subprocess.run([sys.executable, "-c", API_WARM_UP_SCRIPT],
+                              cwd=REPO_ROOT, env=dict(os.environ), capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"API warm-up failed:\n{proc.stderr[-2000:]}")
+        for phase, value in json.loads(proc.stdout.strip().splitlines()[-1]).items():
+            phases[phase].append(value)
+    return {phase: summarize(values, sum(values) / 1000) for phase, values in phases.items()}
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+    # No LLM is called; the OpenAI client only needs a key to be built
+    os.environ.setdefault("OPENAI_API_KEY", "unused")
+    sys.path.insert(0, REPO_ROOT)
+
+    from database import engine, SessionLocal
+    from generate_data import GeneratorConfig, generate
+    from models import Restaurant
+    from seed_data import has_seed_data
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=7, users=100, seed=args.seed))
+    db = SessionLocal()
+    try:
+        restaurant_id = db.query(Restaurant.id).order_by(Restaurant.id).first()[0]
+    finally:
+        db.close()
+
+    results = {}
+    for module in ("mcp_server", "main"):
+        results[module] = time_import(module, args)
+        print(f"import {module:10s} p50 {results[module]['import']['p50_ms']} ms", file=sys.stderr)
+    results["stdio_server"] = asyncio.run(time_stdio_server(args, restaurant_id))
+    results["api_warm_up"] = time_api_warm_up(args)
+
+    report = {
+        "meta": run_metadata(database=engine.dialect.name, runs=args.runs, python=sys.version.split()[0]),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
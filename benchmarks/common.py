@@ -0,0 +1,52 @@
+"""Shared helpers for the benchmark scripts: percentiles, summaries, run metadata."""
+import os
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(timings_ms: List[float], wall_s: float) -> Dict[str, float]:
+    """p50/p95/p99/mean latency (ms) and throughput (ops/s) for one benchmark case."""
+    values = sorted(timings_ms)
+    return {
+        "n": len(values),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "throughput_ops": round(len(values) / wall_s, 1) if wall_s > 0 else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(**extra) -> Dict:
+    return {"git": git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **extra}
+
+
+def use_database(url: Optional[str]) -> str:
+    """
+    Point DATABASE_URL at `url` (or a throwaway SQLite file) before database.py is imported.
+    Returns the URL in use.
+    """
+    if url is None:
+        path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    return url
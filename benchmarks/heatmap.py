@@ -0,0 +1,134 @@
+"""
+Cost of get_availability_heatmap compared with a single availability check.
+
+Both run through the same in-process tool coroutines as benchmarks.tool_hotpaths.
+The result cache and the occupancy bitmaps are switched off, so every call reads
+the database:
+
+- check_availability_single      one check_availability_for_restaurant (free slot)
+- check_availability_next_slot   one check on a full slot (walks the 3-hour look-ahead)
+- heatmap_1x1                    1 restaurant x 1 day, 11:00-23:00 (48 starts)
+- heatmap_1x7                    1 restaurant x 7 days (336 starts)
+- heatmap_5x2                    5 restaurants x 2 days
+
+A heatmap reads the range in one pass, so heatmap_1x1 should cost about the same
+as a single check, even though it answers 48 of them.
+
+Run:
+    python -m benchmarks.heatmap --restaurants 500
+    python -m benchmarks.heatmap --database-url sqlite:///./bench.db --reuse
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import summarize, run_metadata, use_database
+from benchmarks.tool_hotpaths import measure
+
+IST = timezone(timedelta(hours=5, minutes=30))
+BENCH_USER = 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=500)
+    parser.add_argument("--days-back", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200, help="calls per case")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+async def run_cases(args, rng):
+    import mcp_server as m
+    from database import SessionLocal
+    from models import Restaurant
+
+    m.TOOL_CACHE_ENABLED = False
+    m.OCCUPANCY_ENABLED = False
+
+    db = SessionLocal()
+    try:
+        restaurant_ids = [r for (r,) in db.query(Restaurant.id).all()]
+    finally:
+        db.close()
+
+    tomorrow = (datetime.now(IST) + timedelta(days=1)).date()
+    evening = datetime(tomorrow.year, tomorrow.month, tomorrow.day, 16, tzinfo=IST)
+    pick = lambda: rng.choice(restaurant_ids)
+
+    # A few restaurants fully booked 16:00-17:00 (table by table) so a 16:00 check walks the look-ahead
+    full_ids = rng.sample(restaurant_ids, min(10, len(restaurant_ids)))
+    for rid in full_ids:
+        while (await m.make_reservation_tool(
+                BENCH_USER, rid, evening.isoformat(), (evening + timedelta(hours=1)).isoformat(),
+                guests=1, allow_non_contiguous=True))["success"]:
+            pass
+
+    cases = {
+        "check_availability_single": lambda i: m.check_availability_for_restaurant(
+            pick(), evening.isoformat(), None, 2),
+        "check_availability_next_slot": lambda i: m.check_availability_for_restaurant(
+            rng.choice(full_ids), evening.isoformat(), None, 2),
+        "heatmap_1x1": lambda i: m.get_availability_heatmap([pick()], tomorrow.isoformat(), 1, 2),
+        "heatmap_1x7": lambda i: m.get_availability_heatmap([pick()], tomorrow.isoformat(), 7, 2),
+        "heatmap_5x2": lambda i: m.get_availability_heatmap(
+            rng.sample(restaurant_ids, min(5, len(restaurant_ids))), tomorrow.isoformat(), 2, 2),
+    }
+
+    results = {}
+    for name, make_call in cases.items():
+        timings, wall, outcomes = await measure(make_call, args.iterations, args.concurrency)
+        results[name] = summarize(timings, wall)
+        results[name]["failures"] = sum(1 for o in outcomes if not o["success"])
+        print(f"{name:30s} {results[name]}", file=sys.stderr)
+
+    # Leave a reused dataset as we found it
+    from models import Booking
+    db = SessionLocal()
+    try:
+        setup_bookings = [b for (b,) in db.query(Booking.id).filter(
+            Booking.user_id == BENCH_USER, Booking.restaurant_id.in_(full_ids),
+            Booking.start_dt == evening).all()]
+    finally:
+        db.close()
+    for booking_id in setup_bookings:
+        await m.cancel_reservation_tool(booking_id, BENCH_USER)
+
+    return results
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+
+    from database import engine
+    from generate_data import GeneratorConfig, generate
+    from seed_data import has_seed_data
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=args.days_back, seed=args.seed))
+
+    results = asyncio.run(run_cases(args, random.Random(args.seed)))
+    single = results["check_availability_single"]["p50_ms"]
+    results["heatmap_1x1_vs_single_p50"] = round(results["heatmap_1x1"]["p50_ms"] / single, 2) if single else None
+
+    report = {
+        "meta": run_metadata(database=engine.dialect.name, iterations=args.iterations, concurrency=args.concurrency),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Scripted OpenAI-compatible chat completions server for load tests.
+
+Replays deterministic tool-call sequences instead of generating text, so the
+agent loop in ai_client.py can be exercised without network access or paid
+tokens. The next step is derived from the trailing tool results in the request:
+
+area_search (default), mirrors the prompt's "search by area" flow:
+    user message                     -> get_restaurants_in_area(area)
+    get_restaurants_in_area result   -> check_availability_for_restaurant for the first N ids
+    check_availability results       -> get_restaurant_details_by_id for the available ones
+    get_restaurant_details results   -> final answer
+
+availability:
+    user message                     -> check_availability_for_restaurant(restaurant_id=1)
+    result                           -> final answer
+
+Each completion sleeps --latency-ms to stand in for generation time and returns
+a `usage` block estimated from the prompt size. --slow-rate of the completions take
+--slow-ms longer (a slow tail) and --fail-rate of them answer 503, to exercise
+the retries, failover and hedging in llm_gateway.py. Requests sent without `tools`
+(the agent's budget wrap-up) always get a final text answer.
+
+Run standalone (point OPENAI_BASE_URL at http://127.0.0.1:8900/v1):
+    python -m benchmarks.mock_llm --port 8900 --flow area_search --latency-ms 300
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, HTTPException, Request
+
+IST = timezone(timedelta(hours=5, minutes=30))
+# A confused flow can never spin forever: after this many tool results in one turn, answer
+MAX_TOOL_RESULTS_PER_TURN = 16
+
+
+class ScriptedLLM:
+    def __init__(self, flow: str = "area_search", area: str = "Adyar", fan_out: int = 3,
+                 guests: int = 4, latency_ms: float = 0.0, slow_rate: float = 0.0, slow_ms: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = 7):
+        self.flow = flow
+        self.area = area
+        self.fan_out = fan_out
+        self.guests = guests
+        self.latency_s = latency_ms / 1000.0
+        self.slow_rate = slow_rate
+        self.slow_s = slow_ms / 1000.0
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self.completions = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self._ids = itertools.count(1)
+        tomorrow = (datetime.now(IST) + timedelta(days=1)).date()
+        self.start_iso = f"{tomorrow.isoformat()}T19:00:00"
+
+    # ---------------- script ----------------
+
+    def _call(self, name: str, **arguments) -> dict:
+        return {
+            "id": f"call_{next(self._ids)}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+    def next_step(self, messages: list) -> dict:
+        """Return the assistant message (tool calls or final text) for this request."""
+        turn = []
+        for msg in reversed(messages):
+            if msg.get("role") == "user":
+                break
+            turn.append(msg)
+        turn.reverse()
+        tool_results = [m for m in turn if m.get("role") == "tool"]
+        trailing = []
+        for msg in reversed(messages):
+            if msg.get("role") != "tool":
+                break
+            trailing.append(msg)
+        last_tool = trailing[0].get("name") if trailing else None
+
+        if len(tool_results) >= MAX_TOOL_RESULTS_PER_TURN:
+            return {"content": "Here is what I found."}
+
+        if self.flow == "availability":
+            if last_tool is None:
+                return {"tool_calls": [self._call(
+                    "check_availability_for_restaurant",
+                    restaurant_id=1, start_iso=self.start_iso, guests=self.guests)]}
+            return {"content": "The restaurant is available at 7 PM."}
+
+        # area_search
+        if last_tool is None:
+            return {"tool_calls": [self._call("get_restaurants_in_area", area_name=self.area)]}
+
+        if last_tool == "get_restaurants_in_area":
+            data = _data(trailing[0])
+            ids = [r["id"] for r in (data or [])][: self.fan_out]
+            if not ids:
+                return {"content": f"I couldn't find restaurants in {self.area}."}
+            return {"tool_calls": [
+                self._call("check_availability_for_restaurant",
+                           restaurant_id=rid, start_iso=self.start_iso, guests=self.guests)
+                for rid in ids
+            ]}
+
+        if last_tool == "check_availability_for_restaurant":
+            ids = []
+            for msg in trailing:
+                data = _data(msg)
+                if data and data.get("is_available_for_requested_slot"):
+                    ids.append(data["restaurant_id"])
+            if not ids:
+                return {"content": "Everything is booked at 7 PM, shall I check nearby places?"}
+            return {"tool_calls": [self._call("get_restaurant_details_by_id", restaurant_id=rid) for rid in ids]}
+
+        return {"content": "I found a few great options for you in " + self.area + "."}
+
+    # ---------------- API ----------------
+
+    async def complete(self, body: dict) -> dict:
+        delay = self.latency_s + (self.slow_s if self._rng.random() < self.slow_rate else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self.fail_rate:
+            self.failures += 1
+            raise HTTPException(status_code=503, detail="mock upstream unavailable")
+        self.completions += 1
+        if body.get("tools"):
+            step = self.next_step(body.get("messages", []))
+        else:
+            step = {"content": "Here is what I found so far."}
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+        self.prompt_tokens += prompt_chars // 4
+        message = {"role": "assistant", "content": step.get("content")}
+        if "tool_calls" in step:
+            message["tool_calls"] = step["tool_calls"]
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": f"chatcmpl-{self.completions}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "mock",
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if "tool_calls" in step else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_chars // 4 + completion_tokens,
+            },
+        }
+
+
+def _data(tool_message: dict):
+    try:
+        payload = json.loads(tool_message.get("content") or "{}")
+    except ValueError:
+        return None
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if isinstance(data, dict) and set(data) == {"columns", "rows"}:  # TOOL_RESULT_FORMAT=table
+        data = [dict(zip(data["columns"], row)) for row in data["rows"]]
+    return data
+
+
+def create_app(llm: ScriptedLLM) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await llm.complete(await request.json())
+
+    @app.get("/v1/models")
+    def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+
+    return app
+
+
+def serve_in_thread(llm: ScriptedLLM, host: str = "127.0.0.1", port: int = 8900):
+    """Start the mock on a background thread; returns the uvicorn Server once it accepts connections."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(llm), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Scripted OpenAI-compatible mock server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--flow", choices=["area_search", "availability"], default="area_search")
+    parser.add_argument("--area", default="Adyar")
+    parser.add_argument("--fan-out", type=int, default=3, help="availability checks per area search")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated generation time per completion")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of completions that are slow")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="extra latency of a slow completion")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of completions answered with 503")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(ScriptedLLM(args.flow, args.area, args.fan_out, latency_ms=args.latency_ms,
+                               slow_rate=args.slow_rate, slow_ms=args.slow_ms, fail_rate=args.fail_rate)),
+        host=args.host, port=args.port,
+    )
@@ -0,0 +1,180 @@
+"""
+JSON serialization on the chat hot path: fast_json (orjson) against the previous stdlib path.
+
+Payloads are real tool results from a generated dataset:
+- nearby          five_nearby_restaurants (5 restaurants with cuisines, amenities, distance)
+- area_list       get_restaurants_in_area for the busiest area (up to 50 restaurants)
+- heatmap_10x1    get_availability_heatmap for 10 restaurants x 1 day
+- heatmap_3x7     get_availability_heatmap for 3 restaurants x 7 days
+
+Cases, each timed as stdlib / fast:
+- tool_result     tools/call result conversion: FastMCP's (validate against the output
+                  model, dump structured content, pydantic to_json indent=2) against
+                  ReservationMCP.convert_result. The tool runs once; only conversion is timed.
+- decode          the agent reading the tool result text (json.loads against fast_json.loads)
+- conversation    conversation state round trip (encode + zlib + decode) for a 20-message
+                  history holding these tool results
+- api_response    rendering the /chat/send body: FastAPI's jsonable_encoder + JSONResponse
+                  against FastJSONResponse
+
+Per payload, llm_tokens gives the tokens the tool message costs the LLM in each
+TOOL_RESULT_FORMAT (json / compact / table, see tool_result_format.py).
+
+Run:
+    python -m benchmarks.serialization --restaurants 500
+    python -m benchmarks.serialization --database-url sqlite:///./bench.db --reuse
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import summarize, run_metadata, use_database
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=2000, help="operations per case")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+def time_sync(fn, iterations):
+    timings = []
+    t_wall = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return summarize(timings, time.perf_counter() - t_wall)
+
+
+def tool_calls(restaurant_ids, area_name):
+    tomorrow = (datetime.now(IST) + timedelta(days=1)).date().isoformat()
+    return {
+        "nearby": ("five_nearby_restaurants", {"restaurant_id": restaurant_ids[0]}),
+        "area_list": ("get_restaurants_in_area", {"area_name": area_name}),
+        "heatmap_10x1": ("get_availability_heatmap", {"restaurant_ids": restaurant_ids[:10], "start_date": tomorrow}),
+        "heatmap_3x7": ("get_availability_heatmap", {"restaurant_ids": restaurant_ids[:3], "start_date": tomorrow, "days": 7}),
+    }
+
+
+def conversation_state(tool_texts):
+    """A 20-message history: user/assistant turns with the tool results in between."""
+    messages = []
+    while len(messages) < 20:
+        for i, text in enumerate(tool_texts):
+            messages.append({"role": "user", "content": "user_id : 1, query : find me a table for 4 tonight"})
+            messages.append({"role": "assistant", "content": None})
+            messages.append({"role": "tool", "tool_call_id": f"call_{len(messages)}", "name": f"tool_{i}", "content": text})
+    return {"user_id": 1, "messages": messages[:20]}
+
+
+async def run_cases(args, restaurant_ids, area_name):
+    import fast_json
+    import mcp_server as m
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from main import FastJSONResponse
+    from tool_result_format import format_tool_result, count_tokens
+
+    results = {}
+    texts = []
+    for name, (tool, arguments) in tool_calls(restaurant_ids, area_name).items():
+        raw = await m.mcp._tool_manager.call_tool(tool, arguments)
+        meta = m.mcp._tool_manager.get_tool(tool).fn_metadata
+        content, _ = m.mcp.convert_result(tool, raw)
+        if content[0].text != meta.convert_result(raw)[0][0].text:
+            raise RuntimeError(f"{tool}: fast_json text differs from FastMCP's")
+        text = content[0].text
+        texts.append(text)
+        row = {"bytes": len(text.encode())}
+        row["tool_result"] = {
+            "stdlib": time_sync(lambda: meta.convert_result(raw), args.iterations),
+            "fast": time_sync(lambda: m.mcp.convert_result(tool, raw), args.iterations),
+        }
+        row["decode"] = {
+            "stdlib": time_sync(lambda: json.loads(text), args.iterations),
+            "fast": time_sync(lambda: fast_json.loads(text), args.iterations),
+        }
+        row["llm_tokens"] = {fmt: count_tokens(format_tool_result(tool, text, fmt)) for fmt in ("json", "compact", "table")}
+        results[name] = row
+        print(f"{name:14s} {row['bytes']:7d} B  tool_result p50 {row['tool_result']['stdlib']['p50_ms']} -> "
+              f"{row['tool_result']['fast']['p50_ms']} ms", file=sys.stderr)
+
+    state = conversation_state(texts)
+    stdlib_blob = lambda: zlib.compress(json.dumps(state, separators=(",", ":"), default=str).encode(), 6)
+    fast_blob = lambda: zlib.compress(fast_json.dumps_bytes(state), 6)
+    blob = fast_blob()
+    results["conversation"] = {
+        "bytes_compressed": len(blob),
+        "stdlib": time_sync(lambda: json.loads(zlib.decompress(stdlib_blob())), args.iterations),
+        "fast": time_sync(lambda: fast_json.loads(zlib.decompress(fast_blob())), args.iterations),
+    }
+
+    body = {"response": "Here are a few options for tonight.", "context": [
+        {"role": "system", "content": m.__doc__ or ""}] + state["messages"], "conversation_id": "0" * 32}
+    results["api_response"] = {
+        "bytes": len(FastJSONResponse(body).body),
+        "stdlib": time_sync(lambda: JSONResponse(jsonable_encoder(body)), args.iterations),
+        "fast": time_sync(lambda: FastJSONResponse(body), args.iterations),
+    }
+
+    ratio = lambda pair: round(pair["stdlib"]["p50_ms"] / pair["fast"]["p50_ms"], 2) if pair["fast"]["p50_ms"] else None
+    speedup = {}
+    for name, row in results.items():
+        if "fast" in row:
+            speedup[name] = ratio(row)
+            continue
+        for case, pair in row.items():
+            if isinstance(pair, dict) and "fast" in pair:
+                speedup[f"{name}.{case}"] = ratio(pair)
+    results["speedup_p50"] = speedup
+    return results
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+
+    import fast_json
+    from database import engine, SessionLocal
+    from generate_data import GeneratorConfig, generate
+    from models import Restaurant
+    from seed_data import has_seed_data
+    from sqlalchemy import func
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=7, users=100, seed=args.seed))
+
+    db = SessionLocal()
+    try:
+        restaurant_ids = [r for (r,) in db.query(Restaurant.id).order_by(Restaurant.id).all()]
+        area_name = db.query(Restaurant.area).group_by(Restaurant.area).order_by(func.count().desc()).first()[0]
+    finally:
+        db.close()
+
+    results = asyncio.run(run_cases(args, restaurant_ids, area_name))
+    report = {
+        "meta": run_metadata(database=engine.dialect.name, iterations=args.iterations,
+                             orjson=fast_json.orjson is not None),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Per-call cost of the hot tool queries: ORM Query built per call against the
+precompiled Core statements in queries.py.
+
+Each case runs the same SQL both ways on one sync Session:
+- orm    the query as mcp_server.py used to build it: db.query(Model)...all(),
+         constructed, compiled (or cache-looked-up) and loaded into ORM objects every call
+- core   the module-level select() from queries.py with bound parameters, fetched as Rows
+
+and reports wall latency percentiles plus CPU time per call (time.process_time).
+SQLite answers these queries from its page cache, so the difference is mostly
+Python-side statement and row handling: the CPU each tool call saves.
+
+Cases: available_tables, overlapping_reservation_count, restaurant_by_id,
+restaurants_by_name, restaurants_by_area, restaurants_in_box,
+latest_5_user_feedback, latest_5_restaurant_feedback
+
+Run:
+    python -m benchmarks.sql_statements --restaurants 500
+    python -m benchmarks.sql_statements --database-url sqlite:///./bench.db --reuse --iterations 5000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import summarize, run_metadata, use_database
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=2000, help="calls per case and variant")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+def cases(db, rng, restaurant_ids, table_ids, user_ids, area_name, centre):
+    import queries
+    from queries import fetch_all, fetch_one
+    from models import Feedback, Reservation, Restaurant, RestaurantTable
+
+    start = datetime.now(IST).replace(hour=19, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    end = start + timedelta(hours=2)
+    restaurant = lambda: rng.choice(restaurant_ids)
+    # five_nearby_restaurants' prefilter: about 10 km around a restaurant
+    box = dict(min_lat=centre[0] - 0.09, max_lat=centre[0] + 0.09, min_lon=centre[1] - 0.09, max_lon=centre[1] + 0.09)
+
+    def orm_available_tables():
+        RT, R = RestaurantTable, Reservation
+        overlap = db.query(R.id).filter(R.table_id == RT.id).filter(R.end_dt > start).filter(R.start_dt < end).exists()
+        return db.query(RT).filter(RT.restaurant_id == restaurant()).filter(~overlap).all()
+
+    def orm_overlap_count():
+        ids = rng.sample(table_ids, 3)
+        return (db.query(Reservation).filter(Reservation.table_id.in_(ids))
+                .filter(Reservation.end_dt > start).filter(Reservation.start_dt < end).count())
+
+    return {
+        "available_tables": (
+            orm_available_tables,
+            lambda: fetch_all(db, queries.AVAILABLE_TABLES, restaurant_id=restaurant(), start_dt=start, end_dt=end),
+        ),
+        "overlapping_reservation_count": (
+            orm_overlap_count,
+            lambda: fetch_one(db, queries.OVERLAPPING_RESERVATION_COUNT,
+                              table_ids=rng.sample(table_ids, 3), start_dt=start, end_dt=end)[0],
+        ),
+        "restaurant_by_id": (
+            lambda: db.query(Restaurant).filter(Restaurant.id == restaurant()).first(),
+            lambda: fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant()),
+        ),
+        "restaurants_by_name": (
+            lambda: db.query(Restaurant).filter(Restaurant.name.ilike("%an%")).limit(5).all(),
+            lambda: fetch_all(db, queries.RESTAURANTS_BY_NAME, pattern="%an%", limit=5),
+        ),
+        "restaurants_by_area": (
+            lambda: db.query(Restaurant).filter(Restaurant.area.ilike(f"%{area_name}%")).limit(50).all(),
+            lambda: fetch_all(db, queries.RESTAURANTS_BY_AREA, pattern=f"%{area_name}%", limit=50),
+        ),
+        "restaurants_in_box": (
+            lambda: (db.query(Restaurant)
+                     .filter(Restaurant.latitude >= box["min_lat"], Restaurant.latitude <= box["max_lat"])
+                     .filter(Restaurant.longitude >= box["min_lon"], Restaurant.longitude <= box["max_lon"])
+                     .all()),
+            lambda: fetch_all(db, queries.RESTAURANTS_IN_BOX, **box),
+        ),
+        "latest_5_user_feedback": (
+            lambda: (db.query(Feedback).filter(Feedback.user_id == rng.choice(user_ids))
+                     .order_by(Feedback.created_at.desc()).limit(5).all()),
+            lambda: fetch_all(db, queries.LATEST_5_USER_FEEDBACK, user_id=rng.choice(user_ids)),
+        ),
+        "latest_5_restaurant_feedback": (
+            lambda: (db.query(Feedback).filter(Feedback.restaurant_id == restaurant())
+                     .order_by(Feedback.created_at.desc()).limit(5).all()),
+            lambda: fetch_all(db, queries.LATEST_5_RESTAURANT_FEEDBACK, restaurant_id=restaurant()),
+        ),
+    }
+
+
+def time_variant(db, fn, iterations):
+    for _ in range(min(100, iterations)):  # warm the compiled cache and SQLite's page cache
+        fn()
+    db.expunge_all()  # the ORM variant would otherwise run against a growing identity map
+    timings = []
+    cpu0, t_wall = time.process_time(), time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    cpu_s, wall_s = time.process_time() - cpu0, time.perf_counter() - t_wall
+    db.expunge_all()
+    return {**summarize(timings, wall_s), "cpu_us_per_call": round(cpu_s / iterations * 1e6, 1)}
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+
+    from database import engine, SessionLocal
+    from generate_data import GeneratorConfig, generate
+    from models import Feedback, Restaurant, RestaurantTable
+    from seed_data import has_seed_data
+    from sqlalchemy import func
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=30, users=1000, seed=args.seed))
+
+    db = SessionLocal()
+    try:
+        restaurant_ids = [r for (r,) in db.query(Restaurant.id)]
+        table_ids = [t for (t,) in db.query(RestaurantTable.id)]
+        user_ids = [u for (u,) in db.query(Feedback.user_id).distinct()] or [1]
+        area_name = db.query(Restaurant.area).group_by(Restaurant.area).order_by(func.count().desc()).first()[0]
+        centre = db.query(Restaurant.latitude, Restaurant.longitude).filter(Restaurant.id == restaurant_ids[0]).one()
+
+        results = {}
+        for name, (orm_fn, core_fn) in cases(db, random.Random(args.seed), restaurant_ids, table_ids,
+                                             user_ids, area_name, centre).items():
+            row = {"orm": time_variant(db, orm_fn, args.iterations),
+                   "core": time_variant(db, core_fn, args.iterations)}
+            row["cpu_saved_us_per_call"] = round(row["orm"]["cpu_us_per_call"] - row["core"]["cpu_us_per_call"], 1)
+            row["speedup_p50"] = (round(row["orm"]["p50_ms"] / row["core"]["p50_ms"], 2)
+                                  if row["core"]["p50_ms"] else None)
+            results[name] = row
+            print(f"{name:30s} cpu/call {row['orm']['cpu_us_per_call']:8.1f} -> "
+                  f"{row['core']['cpu_us_per_call']:8.1f} us", file=sys.stderr)
+    finally:
+        db.close()
+
+    report = {
+        "meta": run_metadata(database=engine.dialect.name, iterations=args.iterations),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
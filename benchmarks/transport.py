@@ -0,0 +1,200 @@
+"""
+Per-call overhead of the tool transports: stdio JSON-RPC, streamable HTTP and in-process.
+
+Runs the same tool calls through
+- stdio      a ClientSession to a spawned mcp_server.py (one session reused for all calls)
+- http       tool_transport.HttpToolSession to `mcp_server.py --transport streamable-http`
+             started on loopback (--http-port)
+- inprocess  tool_transport.InProcessToolSession in this process
+
+and reports latency percentiles per tool. The tool result cache is switched off
+(TOOL_CACHE=0) so both transports do the same database work. The difference
+between a transport and inprocess is its overhead per call. Session setup
+(spawning and initializing the stdio server, which happens on every chat turn)
+is reported separately.
+
+Tools:
+- get_all_cuisines               no database access: almost pure transport cost
+- get_restaurant_details_by_id   one primary-key lookup
+- check_availability             availability probe with 12-start look-ahead
+- list_tools                     tools/list
+
+Run:
+    python -m benchmarks.transport --iterations 300
+    python -m benchmarks.transport --database-url sqlite:///./bench.db --reuse
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import summarize, run_metadata, use_database
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--reuse", action="store_true", help="skip generation when the database already has data")
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=300, help="calls per tool per transport")
+    parser.add_argument("--spawns", type=int, default=5, help="stdio session setups to time")
+    parser.add_argument("--http-port", type=int, default=8199, help="loopback port for the HTTP tool server")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+def tool_calls(rng, restaurant_ids):
+    tomorrow = (datetime.now(IST) + timedelta(days=1)).date()
+    start = datetime(tomorrow.year, tomorrow.month, tomorrow.day, 19).isoformat()
+    return {
+        "get_all_cuisines": lambda: ("get_all_cuisines", {}),
+        "get_restaurant_details_by_id": lambda: (
+            "get_restaurant_details_by_id", {"restaurant_id": rng.choice(restaurant_ids)}),
+        "check_availability": lambda: (
+            "check_availability_for_restaurant",
+            {"restaurant_id": rng.choice(restaurant_ids), "start_iso": start, "guests": 4}),
+    }
+
+
+async def time_calls(session, calls, iterations):
+    results = {}
+    for name, make in calls.items():
+        timings = []
+        t_wall = time.perf_counter()
+        for _ in range(iterations):
+            tool, arguments = make()
+            t0 = time.perf_counter()
+            result = await session.call_tool(tool, arguments)
+            timings.append((time.perf_counter() - t0) * 1000)
+            if result.isError:
+                raise RuntimeError(f"{tool} failed: {result.content}")
+        results[name] = summarize(timings, time.perf_counter() - t_wall)
+
+    timings = []
+    t_wall = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await session.list_tools()
+        timings.append((time.perf_counter() - t0) * 1000)
+    results["list_tools"] = summarize(timings, time.perf_counter() - t_wall)
+    return results
+
+
+async def run(args, restaurant_ids):
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+    from tool_transport import InProcessToolSession
+
+    params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(REPO_ROOT, "mcp_server.py")], env=dict(os.environ),
+    )
+
+    # Session setup: what every chat turn pays on the stdio transport
+    spawn_ms = []
+    for _ in range(args.spawns):
+        t0 = time.perf_counter()
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                spawn_ms.append((time.perf_counter() - t0) * 1000)
+
+    report = {"session_setup": {"stdio": summarize(spawn_ms, sum(spawn_ms) / 1000)}}
+
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            report["stdio"] = await time_calls(
+                session, tool_calls(random.Random(args.seed), restaurant_ids), args.iterations)
+
+    report["http"] = await run_http(args, restaurant_ids)
+
+    t0 = time.perf_counter()
+    in_process = InProcessToolSession()
+    await in_process.initialize()
+    report["session_setup"]["inprocess_first_use_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    report["inprocess"] = await time_calls(
+        in_process, tool_calls(random.Random(args.seed), restaurant_ids), args.iterations)
+
+    report["overhead_p50_ms"] = {
+        transport: {
+            name: round(report[transport][name]["p50_ms"] - report["inprocess"][name]["p50_ms"], 3)
+            for name in report["inprocess"]
+        }
+        for transport in ("stdio", "http")
+    }
+    return report
+
+
+async def run_http(args, restaurant_ids):
+    """Start a streamable-HTTP tool server on loopback and time the calls through the pooled client."""
+    import subprocess
+    import httpx
+    from tool_transport import HttpToolSession
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "mcp_server.py"),
+         "--transport", "streamable-http", "--port", str(args.http_port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.http_port}/mcp"
+    try:
+        async with httpx.AsyncClient() as probe:
+            for _ in range(200):
+                try:
+                    await probe.get(url)
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+        session = HttpToolSession([url], size=1)
+        try:
+            await session.initialize()
+            return await time_calls(session, tool_calls(random.Random(args.seed), restaurant_ids), args.iterations)
+        finally:
+            await session.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    args = parse_args()
+    use_database(args.database_url)
+    os.environ["TOOL_CACHE"] = "0"
+    os.chdir(REPO_ROOT)
+
+    from database import engine, SessionLocal
+    from generate_data import GeneratorConfig, generate
+    from models import Restaurant
+    from seed_data import has_seed_data
+
+    if not (args.reuse and has_seed_data()):
+        generate(engine, GeneratorConfig(restaurants=args.restaurants, days_back=7, users=100, seed=args.seed))
+
+    db = SessionLocal()
+    try:
+        restaurant_ids = [r for (r,) in db.query(Restaurant.id).all()]
+    finally:
+        db.close()
+
+    results = asyncio.run(run(args, restaurant_ids))
+    report = {
+        "meta": run_metadata(database=engine.dialect.name, iterations=args.iterations),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
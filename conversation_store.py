@@ -0,0 +1,175 @@
+# conversation_store.py
+"""
+Conversation state for /chat/send, kept outside the API process so any worker or
+replica can serve any turn.
+
+Selected with CONVERSATION_STORE:
+- memory  (default) a dict in this process; fine for a single worker
+- sqlite  one SQLite file shared by every worker on the host
+          (CONVERSATION_DB_PATH, default conversations.db)
+- redis   any Redis-compatible server at REDIS_URL (needs the `redis` package);
+          a stand-in client with get/set/delete can be passed in directly
+
+State is a small dict ({"user_id": ..., "messages": [...]}) stored as
+zlib-compressed compact JSON. The system prompt is not stored; the agent adds it
+back on load. Conversations expire CONVERSATION_TTL_S after their last turn.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from dotenv import load_dotenv
+import fast_json
+
+# Load environment variables from .env
+load_dotenv()
+
+CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory").lower()
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+CONVERSATION_TTL_S = int(os.getenv("CONVERSATION_TTL_S", str(24 * 3600)))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def dumps(state: dict) -> bytes:
+    return zlib.compress(fast_json.dumps_bytes(state), 6)
+
+
+def loads(blob: bytes) -> dict:
+    return fast_json.loads(zlib.decompress(blob))
+
+
+class ConversationStore(ABC):
+    """Interface: load/save/delete a conversation's state by id."""
+
+    @abstractmethod
+    def load(self, conversation_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def save(self, conversation_id: str, state: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, conversation_id: str):
+        ...
+
+
+class MemoryConversationStore(ConversationStore):
+    def __init__(self, ttl_s: int = CONVERSATION_TTL_S):
+        self.ttl_s = ttl_s
+        # id -> (expires_at, blob), oldest save first: with one TTL that is expiry order
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, conversation_id):
+        with self._lock:
+            item = self._items.get(conversation_id)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._items[conversation_id]
+                return None
+        return loads(item[1])
+
+    def save(self, conversation_id, state):
+        blob = dumps(state)
+        now = time.time()
+        with self._lock:
+            self._items[conversation_id] = (now + self.ttl_s, blob)
+            self._items.move_to_end(conversation_id)
+            # Abandoned conversations are never loaded again; drop the expired ones from the front
+            while self._items:
+                oldest = next(iter(self._items.values()))
+                if oldest[0] >= now:
+                    break
+                self._items.popitem(last=False)
+
+    def delete(self, conversation_id):
+        with self._lock:
+            self._items.pop(conversation_id, None)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """One table in a SQLite file; WAL mode lets several worker processes read and write it."""
+
+    def __init__(self, path: str = CONVERSATION_DB_PATH, ttl_s: int = CONVERSATION_TTL_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "id TEXT PRIMARY KEY, state BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, conversation_id):
+        row = self._conn().execute(
+            "SELECT state FROM conversations WHERE id = ? AND expires_at > ?",
+            (conversation_id, time.time()),
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def save(self, conversation_id, state):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, state, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, expires_at = excluded.expires_at",
+                (conversation_id, dumps(state), now + self.ttl_s),
+            )
+            # Opportunistic cleanup keeps the file from growing without a separate job
+            conn.execute("DELETE FROM conversations WHERE expires_at < ?", (now,))
+
+    def delete(self, conversation_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+
+class RedisConversationStore(ConversationStore):
+    """Keys `conversation:<id>` with a TTL. `client` is any object with Redis get/set/delete."""
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl_s: int = CONVERSATION_TTL_S):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("CONVERSATION_STORE=redis needs the `redis` package (pip install redis)") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl_s = ttl_s
+
+    @staticmethod
+    def _key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}"
+
+    def load(self, conversation_id):
+        blob = self.client.get(self._key(conversation_id))
+        return loads(blob) if blob is not None else None
+
+    def save(self, conversation_id, state):
+        self.client.set(self._key(conversation_id), dumps(state), ex=self.ttl_s)
+
+    def delete(self, conversation_id):
+        self.client.delete(self._key(conversation_id))
+
+
+def create_store(kind: str = CONVERSATION_STORE) -> ConversationStore:
+    if kind == "memory":
+        return MemoryConversationStore()
+    if kind == "sqlite":
+        return SQLiteConversationStore()
+    if kind == "redis":
+        return RedisConversationStore()
+    raise ValueError(f"Unknown CONVERSATION_STORE '{kind}' (expected memory, sqlite or redis)")
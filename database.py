@@ -3,20 +3,72 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+import tracing
 
 # Load environment variables from .env
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./reservation.db")
 
+# Async drivers for the plain URLs used in .env (sqlite:/// and postgresql://)
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver; URLs that name a driver are kept."""
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# MCP tools use the async engine by default; DB_ASYNC=0 runs them on the sync engine in threads
+DB_ASYNC = os.getenv("DB_ASYNC", "1") == "1"
+
+# Compiled statements cached per engine (SQLAlchemy's default: 500). The tools' reads are a
+# fixed set (queries.py); raise it if other callers build many distinct statements.
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "500"))
+
 engine = create_engine(
     DATABASE_URL,
+    query_cache_size=DB_QUERY_CACHE_SIZE,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 )
 
+tracing.instrument_engine(engine)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+# Built on first use so scripts that stay sync (seed_data.py, archive.py) don't need async drivers
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """Return the shared AsyncEngine (created on first call)."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, query_cache_size=DB_QUERY_CACHE_SIZE)
+        tracing.instrument_engine(_async_engine)
+    return _async_engine
+
+def get_async_sessionmaker():
+    """Return the shared async_sessionmaker (created on first call)."""
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _AsyncSessionLocal = async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _AsyncSessionLocal
+
+def tool_query_engine():
+    """The sync Engine behind MCP tool queries in this process (the async engine's, by default)."""
+    return get_async_engine().sync_engine if DB_ASYNC else engine
+
 def get_db():
     """Provides a database session to the caller."""
     db = SessionLocal()
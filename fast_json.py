@@ -0,0 +1,48 @@
+# fast_json.py
+"""
+JSON encoding for the hot paths: tool results, tool-call arguments, conversation
+state and API responses.
+
+Uses orjson when it is installed (several times faster than the json module on
+the nested dicts the tools return) and the standard library otherwise. Both
+produce the same documents: UTF-8 text, datetimes as ISO 8601, non-string keys
+as strings and anything else unknown via str().
+"""
+import json
+from datetime import date, datetime, time
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional: everything works without it, just slower
+    orjson = None
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """UTF-8 JSON; `indent` gives 2-space indentation like the MCP SDK's text content."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits; the json module handles those
+    if indent:
+        return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode()
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    return dumps_bytes(obj, indent).decode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,253 @@
+# generate_data.py
+"""
+Parameterised synthetic dataset generator for capacity testing.
+
+Builds on the vocabulary of seed_data.py (areas, name words, cuisines, amenities)
+but writes production-scale volumes with bulk Core inserts instead of per-row ORM
+adds:
+
+- N restaurants spread over M areas (each area has its own centre; restaurants
+  scatter within ~2 km of it, so nearby search has realistic density).
+- A range of tables per restaurant.
+- Bookings per restaurant per day over a window of past and upcoming days.
+  Each booking takes the first tables that are free for its window (enough for
+  its guests at TABLE_SIZE seats each) and is skipped when there are not enough,
+  so no table holds overlapping reservations. Unlike allocate_tables_transaction
+  there is no contiguity or table-size logic; the data only has to be consistent
+  for availability answers to be meaningful.
+- Feedback for a fraction of past bookings (always linked to a real booking).
+
+Everything derives from --seed, so the same arguments produce the same dataset.
+
+Run:
+    python generate_data.py --restaurants 2000 --bookings-per-day 8 --days-back 180
+    python generate_data.py --database-url sqlite:///./bench.db --restaurants 500 --seed 7
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from math import ceil
+from typing import Dict, List
+
+from sqlalchemy import create_engine, insert
+
+from models import Base, Restaurant, RestaurantTable, User, Booking, Reservation, Feedback
+from seed_data import AREAS, CATCHY
+
+# IST timezone
+IST = timezone(timedelta(hours=5, minutes=30))
+
+CUISINES_POOL = ["Italian", "Indian", "Chinese", "Mexican", "Continental", "South Indian"]
+AMEN_POOL = ["WiFi", "Parking", "AC", "Outdoor Seating", "Rooftop", "Live Music", "Valet", "Pet Friendly"]
+FEEDBACK_TEXTS = [
+    "Good ambience and food.",
+    "Service could be faster.",
+    "Loved the desserts here.",
+    "Parking was a problem during peak hours.",
+    "Outdoor seating was lovely in the evening.",
+    "WiFi was slow but the food made up for it.",
+    "Great place for a family dinner.",
+    "Too noisy on weekends.",
+]
+
+# Booking start times: lunch and dinner service in 15-min steps
+SERVICE_SLOTS = [(h, m) for h in list(range(12, 15)) + list(range(19, 23)) for m in (0, 15, 30, 45)]
+TABLE_SIZE = 6
+
+
+@dataclass
+class GeneratorConfig:
+    restaurants: int = 500
+    areas: int = 10
+    min_tables: int = 5
+    max_tables: int = 15
+    users: int = 10_000
+    bookings_per_day: int = 6        # per restaurant
+    days_back: int = 90
+    days_ahead: int = 14
+    feedback_ratio: float = 0.2      # fraction of past bookings with feedback
+    seed: int = 42
+    batch_size: int = 20_000
+
+
+def area_names(count: int) -> List[str]:
+    """The demo areas first, then numbered ones."""
+    return [AREAS[i] if i < len(AREAS) else f"Area {i + 1}" for i in range(count)]
+
+
+def _flush(conn, table, rows: List[dict]):
+    if rows:
+        conn.execute(insert(table), rows)
+        rows.clear()
+
+
+def generate(engine, config: GeneratorConfig, reset: bool = True) -> Dict[str, int]:
+    """
+    Write a synthetic dataset through `engine`.
+
+    With reset=True the schema is dropped and recreated first; otherwise the
+    database must be empty (explicit ids start at 1).
+
+    Returns row counts per table.
+    """
+    rng = random.Random(config.seed)
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    counts = {"restaurants": 0, "restaurant_tables": 0, "users": 0,
+              "bookings": 0, "reservations": 0, "feedbacks": 0}
+    now = datetime.now(IST)
+    today = now.date()
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        # --- Users ---
+        rows = []
+        for uid in range(1, config.users + 1):
+            rows.append({"id": uid, "name": f"User {uid}", "phone": f"9{uid:09d}",
+                         "email": f"user{uid}@example.com", "created_at": now})
+            if len(rows) >= config.batch_size:
+                _flush(conn, User.__table__, rows)
+        _flush(conn, User.__table__, rows)
+        counts["users"] = config.users
+
+        # --- Restaurants + tables ---
+        areas = area_names(config.areas)
+        centres = {
+            a: (12.85 + rng.random() * 0.35, 80.10 + rng.random() * 0.20) for a in areas
+        }
+        tables_by_restaurant: Dict[int, List[int]] = {}
+        restaurant_rows, table_rows = [], []
+        table_id = 0
+        for rid in range(1, config.restaurants + 1):
+            area = areas[(rid - 1) % len(areas)]
+            clat, clon = centres[area]
+            restaurant_rows.append({
+                "id": rid,
+                "name": f"GoodFoods {CATCHY[rid % len(CATCHY)]} {area} {rid:02d}",
+                "area": area,
+                "latitude": clat + rng.uniform(-0.018, 0.018),
+                "longitude": clon + rng.uniform(-0.018, 0.018),
+                "cuisines": ",".join(rng.sample(CUISINES_POOL, k=2)),
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "amenities": ", ".join(rng.sample(AMEN_POOL, k=rng.randint(1, 3))),
+                "created_at": now,
+            })
+            ids = []
+            for tno in range(1, rng.randint(config.min_tables, config.max_tables) + 1):
+                table_id += 1
+                ids.append(table_id)
+                table_rows.append({"id": table_id, "restaurant_id": rid, "table_no": tno, "seats": TABLE_SIZE})
+            tables_by_restaurant[rid] = ids
+            if len(table_rows) >= config.batch_size:
+                _flush(conn, Restaurant.__table__, restaurant_rows)
+                _flush(conn, RestaurantTable.__table__, table_rows)
+        _flush(conn, Restaurant.__table__, restaurant_rows)
+        _flush(conn, RestaurantTable.__table__, table_rows)
+        counts["restaurants"] = config.restaurants
+        counts["restaurant_tables"] = table_id
+
+    # --- Bookings, reservations, feedback (one transaction per batch) ---
+    booking_rows, reservation_rows, feedback_rows = [], [], []
+    booking_id = reservation_id = feedback_id = 0
+
+    def flush_all():
+        with engine.begin() as conn:
+            _flush(conn, Booking.__table__, booking_rows)
+            _flush(conn, Reservation.__table__, reservation_rows)
+            _flush(conn, Feedback.__table__, feedback_rows)
+
+    for day_offset in range(-config.days_back, config.days_ahead + 1):
+        day = today + timedelta(days=day_offset)
+        for rid, table_ids in tables_by_restaurant.items():
+            free_at = {t: datetime.min.replace(tzinfo=IST) for t in table_ids}
+            starts = sorted(rng.choice(SERVICE_SLOTS) for _ in range(config.bookings_per_day))
+            for hh, mm in starts:
+                start = datetime(day.year, day.month, day.day, hh, mm, tzinfo=IST)
+                end = start + timedelta(hours=2)
+                guests = rng.randint(1, 12)
+                free = [t for t in table_ids if free_at[t] <= start][:ceil(guests / TABLE_SIZE)]
+                if len(free) < ceil(guests / TABLE_SIZE):
+                    continue  # restaurant full for this slot, like a rejected booking
+
+                booking_id += 1
+                user_id = rng.randint(1, config.users)
+                booking_rows.append({
+                    "id": booking_id, "user_id": user_id, "restaurant_id": rid,
+                    "start_dt": start, "end_dt": end, "guests": guests,
+                    "status": "confirmed", "created_at": start - timedelta(days=rng.randint(0, 7)),
+                })
+                for t in free:
+                    free_at[t] = end
+                    reservation_id += 1
+                    reservation_rows.append({
+                        "id": reservation_id, "booking_id": booking_id, "table_id": t,
+                        "start_dt": start, "end_dt": end, "created_at": now,
+                    })
+                if end < now and rng.random() < config.feedback_ratio:
+                    feedback_id += 1
+                    feedback_rows.append({
+                        "id": feedback_id, "user_id": user_id, "restaurant_id": rid,
+                        "booking_id": booking_id, "stars": rng.randint(1, 5),
+                        "text": rng.choice(FEEDBACK_TEXTS), "created_at": end + timedelta(hours=rng.randint(1, 48)),
+                    })
+                if len(reservation_rows) >= config.batch_size:
+                    flush_all()
+    flush_all()
+
+    counts["bookings"] = booking_id
+    counts["reservations"] = reservation_id
+    counts["feedbacks"] = feedback_id
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic reservation dataset with bulk inserts.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    defaults = GeneratorConfig()
+    parser.add_argument("--database-url", default=None, help="defaults to DATABASE_URL from the environment/.env")
+    parser.add_argument("--restaurants", type=int, default=defaults.restaurants)
+    parser.add_argument("--areas", type=int, default=defaults.areas)
+    parser.add_argument("--min-tables", type=int, default=defaults.min_tables, help="tables per restaurant (min)")
+    parser.add_argument("--max-tables", type=int, default=defaults.max_tables, help="tables per restaurant (max)")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--bookings-per-day", type=int, default=defaults.bookings_per_day, help="per restaurant")
+    parser.add_argument("--days-back", type=int, default=defaults.days_back, help="days of booking history")
+    parser.add_argument("--days-ahead", type=int, default=defaults.days_ahead, help="days of upcoming bookings")
+    parser.add_argument("--feedback-ratio", type=float, default=defaults.feedback_ratio)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from database import engine
+
+    config = GeneratorConfig(
+        restaurants=args.restaurants,
+        areas=args.areas,
+        min_tables=args.min_tables,
+        max_tables=args.max_tables,
+        users=args.users,
+        bookings_per_day=args.bookings_per_day,
+        days_back=args.days_back,
+        days_ahead=args.days_ahead,
+        feedback_ratio=args.feedback_ratio,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    t0 = time.perf_counter()
+    counts = generate(engine, config)
+    print(counts)
+    print(f"Generated in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,223 @@
+# llm_gateway.py
+"""
+chat.completions calls across one or more OpenAI-compatible upstreams.
+
+- Connection reuse: one AsyncOpenAI client per upstream over an httpx pool with
+  keep-alive (LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE), separate connect and
+  request timeouts (LLM_CONNECT_TIMEOUT_S / LLM_REQUEST_TIMEOUT_S).
+- Retries: connection errors, timeouts, 429 and 5xx are retried up to
+  LLM_MAX_RETRIES times with full-jitter exponential backoff (LLM_RETRY_BASE_S,
+  capped at LLM_RETRY_MAX_S). Each retry goes to the next upstream. Other errors
+  (bad request, auth) are raised at once.
+- Failover: upstreams are tried in the order of OPENAI_BASE_URLS, each retry on
+  one not tried yet. One that fails LLM_UPSTREAM_MAX_FAILURES times in a row is
+  tried last for LLM_UPSTREAM_COOLDOWN_S.
+- Hedging (LLM_HEDGE=1): when a request has not answered after LLM_HEDGE_AFTER_S
+  (default: the p95 of recent latencies, once LLM_HEDGE_MIN_SAMPLES are known),
+  a second identical request goes to the next healthy upstream (or the same one
+  if it is the only one) and the first answer wins.
+  A hedge costs a second completion, so it is off by default.
+
+The caller's deadline (TurnBudget) still applies: cancelling create() cancels
+every request it has in flight.
+
+openai and httpx are imported when the first upstream client is built (on the
+first request, or in warm_up()), not when this module is imported.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+import metrics
+
+if TYPE_CHECKING:
+    import openai
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _list_env(name: str, fallback: Optional[str]) -> List[Optional[str]]:
+    values = [v.strip() for v in os.getenv(name, "").split(",") if v.strip()]
+    return values or [fallback]
+
+
+OPENAI_BASE_URLS = _list_env("OPENAI_BASE_URLS", os.getenv("OPENAI_BASE_URL"))
+OPENAI_API_KEYS = _list_env("OPENAI_API_KEYS", os.getenv("OPENAI_API_KEY"))  # one per URL, or one for all
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "60"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "0.25"))
+LLM_RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "4"))
+LLM_UPSTREAM_MAX_FAILURES = int(os.getenv("LLM_UPSTREAM_MAX_FAILURES", "3"))
+LLM_UPSTREAM_COOLDOWN_S = float(os.getenv("LLM_UPSTREAM_COOLDOWN_S", "30"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes", "on")
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))  # 0: use the observed p95
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+
+def is_retryable(error: BaseException) -> bool:
+    import openai
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True  # APIConnectionError includes APITimeoutError
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+
+
+@dataclass
+class Upstream:
+    name: str
+    base_url: Optional[str]
+    api_key: Optional[str]
+    failures: int = 0
+    down_until: float = 0.0
+    _client: Optional["openai.AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        if self._client is None:
+            import httpx
+            import openai
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+            timeout = httpx.Timeout(LLM_REQUEST_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S)
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # retried here, across upstreams
+                timeout=timeout,
+                http_client=openai.DefaultAsyncHttpxClient(limits=limits, timeout=timeout),
+            )
+        return self._client
+
+
+class LLMGateway:
+    def __init__(self, upstreams: List[Upstream], max_retries: int = LLM_MAX_RETRIES,
+                 retry_base_s: float = LLM_RETRY_BASE_S, retry_max_s: float = LLM_RETRY_MAX_S,
+                 hedge: bool = LLM_HEDGE, hedge_after_s: float = LLM_HEDGE_AFTER_S,
+                 hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.upstreams = upstreams
+        self.max_retries = max_retries
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.hedge = hedge
+        self.hedge_after_s = hedge_after_s
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=500)  # seconds, successful requests
+
+    def warm_up(self):
+        """Build the upstream clients now (imports openai), e.g. in the background at startup."""
+        for upstream in self.upstreams:
+            upstream.client
+
+    # ---------------- upstream selection ----------------
+
+    def _pick(self, tried: List[Upstream]):
+        """(primary, hedge target): the first healthy upstream not tried yet, and the next healthy one."""
+        now = time.monotonic()
+        healthy = [u for u in self.upstreams if u.down_until <= now]
+        order = healthy + [u for u in self.upstreams if u.down_until > now]
+        primary = next((u for u in order if u not in tried), order[0])
+        secondary = next((u for u in healthy if u is not primary), primary)
+        return primary, secondary
+
+    def _record(self, upstream: Upstream, error: Optional[BaseException], elapsed_s: float):
+        if error is None:
+            upstream.failures = 0
+            self._latencies.append(elapsed_s)
+            metrics.LLM_UPSTREAM_REQUESTS.inc(upstream=upstream.name, outcome="ok")
+            return
+        retryable = is_retryable(error)
+        metrics.LLM_UPSTREAM_REQUESTS.inc(upstream=upstream.name, outcome="retryable_error" if retryable else "error")
+        if retryable:
+            upstream.failures += 1
+            if upstream.failures >= LLM_UPSTREAM_MAX_FAILURES and upstream.down_until <= time.monotonic():
+                upstream.down_until = time.monotonic() + LLM_UPSTREAM_COOLDOWN_S
+                logger.warning(f"LLM upstream {upstream.name} failed {upstream.failures} times in a row; "
+                               f"skipping it for {LLM_UPSTREAM_COOLDOWN_S:.0f}s")
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off / not calibrated yet."""
+        if not self.hedge:
+            return None
+        if self.hedge_after_s:
+            return self.hedge_after_s
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        values = sorted(self._latencies)
+        return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+    # ---------------- requests ----------------
+
+    async def _request(self, upstream: Upstream, kwargs: dict):
+        t0 = time.monotonic()
+        try:
+            res = await upstream.client.chat.completions.create(**kwargs)
+        except asyncio.CancelledError:
+            raise  # lost a hedge race or the turn was cancelled; not the upstream's fault
+        except Exception as e:
+            self._record(upstream, e, time.monotonic() - t0)
+            raise
+        self._record(upstream, None, time.monotonic() - t0)
+        return res
+
+    async def _hedged(self, primary: Upstream, secondary: Upstream, kwargs: dict):
+        first = asyncio.ensure_future(self._request(primary, kwargs))
+        delay = self.hedge_delay()
+        if delay is None:
+            return await first
+        second = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+            second = asyncio.ensure_future(self._request(secondary, kwargs))
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        metrics.LLM_HEDGES.inc(outcome="hedge_won" if task is second else "first_won")
+                        return task.result()
+                    error = task.exception()
+            metrics.LLM_HEDGES.inc(outcome="both_failed")
+            raise error
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def create(self, **kwargs):
+        """chat.completions.create with retries, failover and (optionally) hedging."""
+        tried = []
+        for attempt in range(self.max_retries + 1):
+            primary, secondary = self._pick(tried)
+            tried.append(primary)
+            try:
+                return await self._hedged(primary, secondary, kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                backoff = random.uniform(0, min(self.retry_max_s, self.retry_base_s * 2 ** attempt))
+                logger.warning(f"LLM request to {primary.name} failed ({type(e).__name__}); "
+                               f"retrying in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+
+
+def create_gateway() -> LLMGateway:
+    upstreams = []
+    for i, base_url in enumerate(OPENAI_BASE_URLS):
+        api_key = OPENAI_API_KEYS[i] if i < len(OPENAI_API_KEYS) else OPENAI_API_KEYS[0]
+        name = urlparse(base_url).netloc if base_url else "api.openai.com"
+        upstreams.append(Upstream(name=name, base_url=base_url, api_key=api_key))
+    return LLMGateway(upstreams)
@@ -1,14 +1,29 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import threading
+import time
+from typing import Optional
+from fastapi import FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from seed_data import seed_data
+from fastapi.responses import JSONResponse, PlainTextResponse
+import fast_json
+import metrics
+from migrations import run_migrations
+from seed_data import seed_data, has_seed_data
 from schema import SendMessageRequest
-from ai_client import ai_agent
+from ai_client import run_conversation_turn, new_conversation_id, warm_up
 
 
 # -------------------------------------------------
 # FastAPI Application Initialization
 # -------------------------------------------------
-app = FastAPI(title="Restaurant Reservation System")
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with fast_json (orjson when installed)."""
+
+    def render(self, content) -> bytes:
+        return fast_json.dumps_bytes(content)
+
+
+app = FastAPI(title="Restaurant Reservation System", default_response_class=FastJSONResponse)
 # -------------------------------------------------
 # Middleware Configuration
 # -------------------------------------------------
@@ -21,15 +36,47 @@ app.add_middleware(
 )
 
 # -------------------------------------------------
-# Startup Event: Create and Populate Database
+# Metrics
+# -------------------------------------------------
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (not raw path) to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+# -------------------------------------------------
+# Startup Event: Migrate Database (non-destructive)
 # -------------------------------------------------
+def prepare_database():
+    """Run the migrations and seed an empty database (blocking; see startup_event)."""
+    print("Applying database migrations...")
+    print("Migrations:", run_migrations())
+    if not has_seed_data():
+        print("Empty database, seeding sample data...")
+        seed_data(reset=False)
+    print("Database initialized and ready.")
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Initializes database tables and populates sample data when app starts. Also initializes the reservation agent with default user_id 1."""
+    """Applies idempotent schema migrations when app starts. Sample data is only seeded into an empty database; use `python seed_data.py` to reset and reseed explicitly."""
+    # The LLM and MCP clients are imported lazily; load them while the database is prepared
+    threading.Thread(target=warm_up, name="agent-warm-up", daemon=True).start()
     try:
-        print("Initializing database and seeding sample data...")
-        seed_data()
-        print("Database initialized and ready.")
+        # In a worker thread: a slow migration or backfill must not block the event loop
+        await asyncio.to_thread(prepare_database)
     except Exception as e:
         print("Error during startup:", str(e))
 
@@ -42,9 +89,16 @@ def health_check():
     """Health check endpoint."""
     return {"status": "OK"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/chat/send", summary="Reservation Chat")
-async def send_message(request: SendMessageRequest):
-    if ai_agent is None:
-        raise HTTPException(400, "Chat not started. Call /chat/start first.")
-    result = await ai_agent.run_query(request.message)
-    return result
\ No newline at end of file
+async def send_message(request: SendMessageRequest, x_request_id: Optional[str] = Header(None)):
+    # No conversation_id starts a new conversation; the id comes back in the response
+    conversation_id = request.conversation_id or new_conversation_id()
+    # X-Request-ID (if sent) becomes the trace request id for this turn
+    result = await run_conversation_turn(conversation_id, request.message, request_id=x_request_id)
+    # Returned as a response so FastAPI skips its jsonable_encoder pass over the whole context
+    return FastJSONResponse(result)
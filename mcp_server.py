@@ -1,19 +1,20 @@
-from typing import List, Optional, Dict, Tuple, Any
+import asyncio
+import functools
+import inspect
+import os
+from typing import List, Optional, Dict, Tuple, Any, Callable
 from datetime import datetime, timedelta, timezone
 from math import ceil, radians, cos, sin, asin, sqrt, atan2, degrees
-from threading import Lock
+from threading import Lock, Thread
 
+from mcp import types
 from mcp.server.fastmcp import FastMCP
-from database import get_db
-from sqlalchemy import func
-from models import (
-    Restaurant,
-    RestaurantTable,
-    User,
-    Booking,
-    Reservation,
-    Feedback,
-)
+import fast_json
+import tracing
+from tool_cache import ToolResultCache
+from single_flight import SingleFlight
+import metrics
+# sqlalchemy, database, models, queries and occupancy are imported by load_db_layer()
 
 # import logging
 # import sys
@@ -42,8 +43,68 @@ def get_restaurant_lock(restaurant_id: int) -> Lock:
     return _RESTAURANT_LOCKS[restaurant_id]
 
 
+# Event-loop counterpart used by the async tools. A threading Lock must not be
+# awaited on the loop thread: a second booking for the same restaurant would block
+# the loop while the first one is suspended on database I/O.
+_RESTAURANT_ASYNC_LOCKS = {}
 
-mcp = FastMCP("Reservation-Agent")
+def get_restaurant_async_lock(restaurant_id: int) -> asyncio.Lock:
+    if restaurant_id not in _RESTAURANT_ASYNC_LOCKS:
+        _RESTAURANT_ASYNC_LOCKS[restaurant_id] = asyncio.Lock()
+    return _RESTAURANT_ASYNC_LOCKS[restaurant_id]
+
+
+
+class ReservationMCP(FastMCP):
+    """
+    FastMCP with a cheaper result path for tools returning dicts (all of ours).
+
+    FastMCP validates a dict result against its output model, dumps it again for
+    structuredContent and encodes the text content with indent=2. Here the dict is
+    encoded once with fast_json (same indented text) and passed through as the
+    structured content. Other results take FastMCP's conversion.
+    """
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        result = await self._tool_manager.call_tool(name, arguments, context=self.get_context())
+        return self.convert_result(name, result)
+
+    def convert_result(self, name: str, result: Any):
+        meta = self._tool_manager.get_tool(name).fn_metadata
+        if not isinstance(result, dict):
+            return meta.convert_result(result)
+        content = [types.TextContent(type="text", text=fast_json.dumps(result, indent=True))]
+        if meta.output_schema is None:
+            return content
+        return content, ({"result": result} if meta.wrap_output else result)
+
+
+mcp = ReservationMCP("Reservation-Agent")
+
+
+def _trace_carrier() -> Dict[str, Any]:
+    """Trace context the client sent in the `_meta` of the current tools/call (empty outside a request)."""
+    try:
+        meta = mcp.get_context().request_context.meta
+    except (ValueError, LookupError):
+        return {}
+    return (meta.model_extra or {}) if meta is not None else {}
+
+
+def traced_tool(fn):
+    """Run a tool inside a `tool.<name>` span, joined to the caller's request id."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with tracing.continue_from(_trace_carrier()), tracing.span(f"tool.{fn.__name__}"):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with tracing.continue_from(_trace_carrier()), tracing.span(f"tool.{fn.__name__}"):
+            return fn(*args, **kwargs)
+    return wrapper
 
 # --------------------------- Helpers ---------------------------
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -73,6 +134,119 @@ def dt_to_iso(dt: datetime) -> str:
     return dt.astimezone(IST).isoformat()
 
 
+# --------------------------- Database layer ---------------------------
+# SQLAlchemy, the ORM models and the occupancy index are about a third of this module's
+# import time. A server started with `python mcp_server.py` loads them on a background
+# thread (see __main__), so it answers initialize and tools/list without waiting for
+# them; run_db() waits if a tool call comes first. Imported as a module (in-process
+# transport, benchmarks) they are loaded at import.
+_DB_LAYER_LOCK = Lock()
+_DB_LAYER_LOADED = False
+
+
+def load_db_layer():
+    """Import the database modules into this module and configure the ORM mappers (once)."""
+    global _DB_LAYER_LOADED, OCCUPANCY, SessionLocal, DB_ASYNC, get_async_sessionmaker
+    global Booking, Reservation, Feedback, queries, fetch_all, fetch_one
+    global load_range, window_fit_counts, SLOTS_PER_DAY
+    with _DB_LAYER_LOCK:
+        if _DB_LAYER_LOADED:
+            return
+        from sqlalchemy.orm import configure_mappers
+        from database import SessionLocal, DB_ASYNC, get_async_sessionmaker, tool_query_engine
+        from models import Booking, Reservation, Feedback  # writes; reads use queries.py
+        from occupancy import OccupancyIndex, load_range, window_fit_counts, SLOTS_PER_DAY
+        import queries
+        from queries import fetch_all, fetch_one
+        configure_mappers()  # otherwise done by the first query
+        if DB_ASYNC:
+            get_async_sessionmaker()  # async engine and driver
+        pool = tool_query_engine().pool
+        metrics.DB_POOL_CHECKED_OUT.set_function(lambda: getattr(pool, "checkedout", lambda: 0)())
+        metrics.DB_POOL_SIZE.set_function(lambda: getattr(pool, "size", lambda: 0)())
+        OCCUPANCY = OccupancyIndex(ttl_s=OCCUPANCY_TTL_S)
+        _DB_LAYER_LOADED = True
+
+
+def _run_sync_session(fn: Callable, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def run_db(fn: Callable, *args):
+    """
+    Run `fn(db, *args)` without blocking the event loop.
+
+    - Async mode (default): `fn` runs on an AsyncSession via run_sync, so every
+      statement awaits the async driver (aiosqlite / asyncpg) and other tool calls
+      proceed while SQL is in flight.
+    - Sync fallback (DB_ASYNC=0): `fn` runs on a regular Session in a worker thread.
+    """
+    if not _DB_LAYER_LOADED:
+        await asyncio.to_thread(load_db_layer)
+    if DB_ASYNC:
+        async with get_async_sessionmaker()() as db:
+            return await db.run_sync(fn, *args)
+    return await asyncio.to_thread(_run_sync_session, fn, *args)
+
+
+# --------------------------- Result cache ---------------------------
+# Read-only tool results shared across chat turns. Availability answers change with every
+# booking, so they get a short TTL and are dropped on booking/cancel for their restaurant;
+# restaurant facts (area, cuisines, ratings) change only with the catalogue and live long.
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE", "1") == "1"
+AVAILABILITY_CACHE_TTL_S = float(os.getenv("TOOL_CACHE_AVAILABILITY_TTL_S", "15"))
+STATIC_CACHE_TTL_S = float(os.getenv("TOOL_CACHE_STATIC_TTL_S", "600"))
+
+TOOL_CACHE = ToolResultCache(max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "10000")))
+
+
+# Concurrent identical reads share one database execution (always on; it never serves stale data)
+SINGLE_FLIGHT = SingleFlight()
+metrics.SINGLE_FLIGHT_IN_FLIGHT.set_function(lambda: SINGLE_FLIGHT.stats(top=0)["in_flight"])
+
+
+async def run_cached(ttl_s: float, restaurant_id: Optional[int], fn: Callable, *args):
+    """
+    run_db(fn, *args) behind TOOL_CACHE and SINGLE_FLIGHT.
+
+    `restaurant_id` tags the entry so invalidate_restaurant() can drop it. Results are
+    only cached when the tool call did not raise. The single-flight key includes the
+    restaurant's invalidation generation, so a call arriving after a booking never
+    joins a read that started before it.
+    """
+    key = TOOL_CACHE.make_key(fn.__name__, args)
+    if TOOL_CACHE_ENABLED:
+        hit, value = TOOL_CACHE.get(key)
+        if hit:
+            return value
+    generation = TOOL_CACHE.generation(restaurant_id)
+    flight_key = key + (generation,)
+    metrics.SINGLE_FLIGHT_CALLS.inc(
+        tool=fn.__name__.lstrip("_"), role="shared" if SINGLE_FLIGHT.in_flight(flight_key) else "leader")
+    value = await SINGLE_FLIGHT.run(flight_key, run_db, fn, *args)
+    if TOOL_CACHE_ENABLED:
+        TOOL_CACHE.put(key, value, ttl_s, tag=restaurant_id, generation=generation)
+    return value
+
+
+def invalidate_restaurant(restaurant_id: Optional[int]):
+    """Drop cached results for a restaurant whose bookings or feedback just changed."""
+    if restaurant_id is not None:
+        TOOL_CACHE.invalidate(restaurant_id)
+
+
+# --------------------------- Occupancy bitmaps ---------------------------
+# 15-minute slot bitmaps per table per day (occupancy.py), kept current by this process's
+# bookings/cancels and reloaded after OCCUPANCY_TTL_S to pick up other writers.
+OCCUPANCY_ENABLED = os.getenv("OCCUPANCY_INDEX", "1") == "1"
+OCCUPANCY_TTL_S = float(os.getenv("OCCUPANCY_TTL_S", "30"))
+OCCUPANCY = None  # OccupancyIndex, created by load_db_layer()
+
+
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Return distance in kilometers between two lat/lon points."""
     lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
@@ -89,37 +263,15 @@ def tables_needed(guests: int, table_size: int = 6) -> int:
 
 def get_available_tables(db, restaurant_id: int, start_dt: datetime, end_dt: datetime):
     """
-    Returns all tables in the restaurant that are free between start_dt and end_dt.
-    Uses NOT EXISTS to avoid N+1 queries.
-    """
-
-    RT = RestaurantTable
-    R  = Reservation
-    B  = Booking
+    Returns (id, table_no) rows for the tables in the restaurant that are free between
+    start_dt and end_dt. Uses NOT EXISTS to avoid N+1 queries.
 
-    # Subquery: find reservations that overlap with the requested window
-    overlap_subq = (
-        db.query(R.id)
-        .join(B, R.booking_id == B.id)
-        .filter(R.table_id == RT.id)
-        .filter(
-            ~(
-                (B.end_dt <= start_dt) |   # booking ends before new one starts
-                (B.start_dt >= end_dt)    # booking starts after new one ends
-            )
-        )
-        .exists()
-    )
-
-    # Main query: all restaurant tables where NO overlapping reservation exists
-    available = (
-        db.query(RT)
-        .filter(RT.restaurant_id == restaurant_id)
-        .filter(~overlap_subq)        # NOT EXISTS (overlapping reservation)
-        .all()
-    )
-
-    return available
+    Reservations carry their booking's window, so the overlap check is a single-table
+    range probe on ix_reservation_table_window: `end_dt > start_dt` seeks past every
+    reservation that already finished, keeping the cost tied to upcoming bookings
+    rather than the full history. The statement is queries.AVAILABLE_TABLES.
+    """
+    return fetch_all(db, queries.AVAILABLE_TABLES, restaurant_id=restaurant_id, start_dt=start_dt, end_dt=end_dt)
 
 
 def allocate_tables_transaction(
@@ -165,18 +317,9 @@ def allocate_tables_transaction(
 
             # Simple re-check: ensure these tables are STILL free
             chosen_ids = [tbl.id for tbl in chosen]
-            conflicts = (
-                db.query(Reservation)
-                .filter(Reservation.table_id.in_(chosen_ids))
-                .join(Booking, Reservation.booking_id == Booking.id)
-                .filter(
-                    ~(
-                        (Booking.end_dt <= start_dt) |
-                        (Booking.start_dt >= end_dt)
-                    )
-                )
-                .count()
-            )
+            conflicts = fetch_one(
+                db, queries.OVERLAPPING_RESERVATION_COUNT, table_ids=chosen_ids, start_dt=start_dt, end_dt=end_dt
+            )[0]
 
             if conflicts > 0:
                 return {"success": False, "error": "Conflict detected, please try again", "reservations": []}
@@ -196,11 +339,13 @@ def allocate_tables_transaction(
 
             created_res_rows = []
 
-            # Create reservation rows only with booking_id + table_id
+            # Create reservation rows (table assignment + copy of the booking window)
             for tbl in chosen:
                 res = Reservation(
                     booking_id=booking.id,
                     table_id=tbl.id,
+                    start_dt=start_dt,
+                    end_dt=end_dt,
                     created_at=now_ist()
                 )
                 db.add(res)
@@ -215,10 +360,11 @@ def allocate_tables_transaction(
                 "success": True,
                 "message": "Booking created successfully",
                 "booking_id": booking.id,
-                "reservations": created_res_rows
+                "reservations": created_res_rows,
+                "table_ids": chosen_ids,
             }
 
-def center_of_area(area_name: str) -> Dict[str, Any]:
+def center_of_area(db, area_name: str) -> Dict[str, Any]:
     """
     Compute the geographic centroid (spherical mean) of restaurants in the given area.
 
@@ -234,12 +380,7 @@ def center_of_area(area_name: str) -> Dict[str, Any]:
         }
     """
     try:
-        db = next(get_db())
-        rows = (
-            db.query(Restaurant.latitude, Restaurant.longitude)
-            .filter(Restaurant.area.ilike(f"%{area_name}%"))
-            .all()
-        )
+        rows = fetch_all(db, queries.AREA_COORDINATES, pattern=f"%{area_name}%")
 
         if not rows:
             return {
@@ -280,100 +421,279 @@ def center_of_area(area_name: str) -> Dict[str, Any]:
 
 # --------------------------- MCP Tools (server-side only) ---------------------------
 
-@mcp.tool()
-def check_availability_for_restaurant(restaurant_id: int, start_iso: str, end_iso: Optional[str] = None, guests: int = 1) -> Dict[str, Any]:
-    """Check availability for a specific restaurant and time window.
-
-    Returns available (bool) and next_slots (list iso) within next 3 hours if not available.
-    This tool intentionally does NOT search by area; it focuses only on restaurant id + slot.
-    """
-    try:
-        db = next(get_db())
-        start_dt = iso_to_dt(start_iso)
-        end_dt = iso_to_dt(end_iso) if end_iso else start_dt + timedelta(hours=2)
-
+def _check_availability_for_restaurant(db, restaurant_id: int, start_iso: str, end_iso: Optional[str] = None, guests: int = 1) -> Dict[str, Any]:
+    start_dt = iso_to_dt(start_iso)
+    end_dt = iso_to_dt(end_iso) if end_iso else start_dt + timedelta(hours=2)
+
+    # look ahead up to 3 hours in 15-min steps
+    gran = timedelta(minutes=15)
+    limit = timedelta(hours=3)
+    look_ahead = [start_dt + gran * i for i in range(1, int(limit / gran) + 1)]
+
+    # Slot-aligned windows are answered from the occupancy bitmaps in one pass
+    counts = None
+    if OCCUPANCY_ENABLED:
+        counts = OCCUPANCY.free_table_counts(db, restaurant_id, [start_dt] + look_ahead, end_dt - start_dt)
+
+    if counts is not None:
+        ok = counts[0] >= tables_needed(guests)
+        next_slots = [] if ok else [
+            dt_to_iso(t) for t, free in zip(look_ahead, counts[1:]) if free >= tables_needed(guests)
+        ][:3]
+    else:
         free_tables = get_available_tables(db, restaurant_id, start_dt, end_dt)
         ok = len(free_tables) >= tables_needed(guests)
 
         next_slots = []
         if not ok:
-            # look ahead up to 3 hours in 15-min steps
-            gran = timedelta(minutes=15)
-            limit = timedelta(hours=3)
-            t = start_dt + gran
             collected = 0
-            while t <= start_dt + limit and collected < 3:
+            for t in look_ahead:
+                if collected >= 3:
+                    break
                 e = t + (end_dt - start_dt)
                 ft = get_available_tables(db, restaurant_id, t, e)
                 if len(ft) >= tables_needed(guests):
                     next_slots.append(dt_to_iso(t))
                     collected += 1
-                t += gran
 
-        # Determine final success based on availability
-        if ok or len(next_slots) > 0:
-            return {
-                "success": True,
-                "data": {
-                    "restaurant_id": restaurant_id,
-                    "requested_slot": {
-                        "start_iso": dt_to_iso(start_dt),
-                        "end_iso": dt_to_iso(end_dt)
-                    },
-                    "is_available_for_requested_slot": ok,
-                    "next_available_slots": next_slots
-                }
-            }
-        else:
-            return {
-                "success": False,
-                "error": (
-                    f"The requested slot is not available for restaurant {restaurant_id} "
-                    f"and there are no nearby upcoming slots available."
-                )
+    # Determine final success based on availability
+    if ok or len(next_slots) > 0:
+        return {
+            "success": True,
+            "data": {
+                "restaurant_id": restaurant_id,
+                "requested_slot": {
+                    "start_iso": dt_to_iso(start_dt),
+                    "end_iso": dt_to_iso(end_dt)
+                },
+                "is_available_for_requested_slot": ok,
+                "next_available_slots": next_slots
             }
-    
+        }
+    else:
+        return {
+            "success": False,
+            "error": (
+                f"The requested slot is not available for restaurant {restaurant_id} "
+                f"and there are no nearby upcoming slots available."
+            )
+        }
+
+
+@mcp.tool()
+@traced_tool
+async def check_availability_for_restaurant(restaurant_id: int, start_iso: str, end_iso: Optional[str] = None, guests: int = 1) -> Dict[str, Any]:
+    """Check availability for a specific restaurant and time window.
+
+    Returns available (bool) and next_slots (list iso) within next 3 hours if not available.
+    This tool intentionally does NOT search by area; it focuses only on restaurant id + slot.
+    """
+    try:
+        # Canonical ISO strings so "19:00" and "19:00:00+05:30" share a cache entry
+        start_iso = dt_to_iso(iso_to_dt(start_iso))
+        end_iso = dt_to_iso(iso_to_dt(end_iso)) if end_iso else None
+        return await run_cached(
+            AVAILABILITY_CACHE_TTL_S, restaurant_id,
+            _check_availability_for_restaurant, restaurant_id, start_iso, end_iso, guests,
+        )
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+HEATMAP_MAX_RESTAURANTS = 10
+HEATMAP_MAX_DAYS = 7
+
+
+def _bookable_ranges(starts: List[datetime], counts: List[int], needed: int) -> List[str]:
+    """Collapse the start times that fit `needed` tables into "HH:MM-HH:MM" ranges."""
+    ranges, run = [], None
+    for t, free in zip(starts, counts):
+        if free >= needed:
+            run = (run[0], t) if run else (t, t)
+        elif run:
+            ranges.append(run)
+            run = None
+    if run:
+        ranges.append(run)
+    return [f"{a:%H:%M}" if a == b else f"{a:%H:%M}-{b:%H:%M}" for a, b in ranges]
+
+
+def _get_availability_heatmap(
+    db,
+    restaurant_ids: List[int],
+    start_date: str,
+    days: int = 1,
+    guests: int = 1,
+    duration_minutes: int = 120,
+    from_hour: int = 11,
+    to_hour: int = 23,
+) -> Dict[str, Any]:
+    if not restaurant_ids or len(restaurant_ids) > HEATMAP_MAX_RESTAURANTS:
+        return {"success": False, "error": f"Provide 1 to {HEATMAP_MAX_RESTAURANTS} restaurant ids"}
+    if not 1 <= days <= HEATMAP_MAX_DAYS:
+        return {"success": False, "error": f"days must be between 1 and {HEATMAP_MAX_DAYS}"}
+    if not 0 <= from_hour < to_hour <= 24:
+        return {"success": False, "error": "Invalid hours: need 0 <= from_hour < to_hour <= 24"}
+    if duration_minutes <= 0 or duration_minutes % 15:
+        return {"success": False, "error": "duration_minutes must be a positive multiple of 15"}
+    if guests <= 0:
+        return {"success": False, "error": "Invalid guest count"}
+
+    first_day = datetime.fromisoformat(start_date).date()
+    slots_per_hour = 4
+    window = duration_minutes // 15
+    needed = tables_needed(guests)
+
+    # One pass over the range (+1 day so late windows can run past midnight)
+    occupancy = load_range(db, restaurant_ids, first_day, days + 1)
+    span = SLOTS_PER_DAY * (days + 1)
+
+    results = []
+    for rid in restaurant_ids:
+        table_ids, bits = occupancy[rid]
+        if not table_ids:
+            results.append({"restaurant_id": rid, "error": "Restaurant not found or has no tables"})
+            continue
+        grid = []
+        for d in range(days):
+            day = first_day + timedelta(days=d)
+            positions = list(range(d * SLOTS_PER_DAY + from_hour * slots_per_hour,
+                                   d * SLOTS_PER_DAY + to_hour * slots_per_hour))
+            counts = window_fit_counts(bits, span, window, positions)
+            starts = [datetime.combine(day, datetime.min.time()) + timedelta(minutes=15 * (p - d * SLOTS_PER_DAY))
+                      for p in positions]
+            grid.append({
+                "date": day.isoformat(),
+                "free_tables": counts,
+                "bookable": _bookable_ranges(starts, counts, needed),
+            })
+        results.append({"restaurant_id": rid, "tables": len(table_ids), "days": grid})
+
+    return {
+        "success": True,
+        "data": {
+            "slot_minutes": 15,
+            "first_slot": f"{from_hour:02d}:00",
+            "duration_minutes": duration_minutes,
+            "tables_needed": needed,
+            "restaurants": results,
+        }
+    }
+
+
 @mcp.tool()
-def get_restaurant_details_by_id(restaurant_id: int) -> Dict[str, Any]:
+@traced_tool
+async def get_availability_heatmap(
+    restaurant_ids: List[int],
+    start_date: str,
+    days: int = 1,
+    guests: int = 1,
+    duration_minutes: int = 120,
+    from_hour: int = 11,
+    to_hour: int = 23,
+) -> Dict[str, Any]:
     """
-    Return necessary details of a restaurant given its restaurant_id.
+    Availability grid for one or more restaurants over a date range, in one call.
+    Use this for open questions like "when can I get a table at X this weekend?"
+    instead of checking slot by slot.
+
+    Args:
+      restaurant_ids: up to 10 restaurant ids
+      start_date: first day, "YYYY-MM-DD"
+      days: number of days (1-7)
+      guests: party size (decides tables_needed)
+      duration_minutes: length of the stay each start time is checked for (multiple of 15)
+      from_hour / to_hour: start times covered each day, in 15-minute steps
 
     Returns:
       success: True/False
-      data: { id, name, area, cuisines, amenities }
+      data: {
+        slot_minutes, first_slot, duration_minutes, tables_needed,
+        restaurants: [ { restaurant_id, tables, days: [
+          { date, free_tables: [count per 15-min start from first_slot],
+            bookable: ["HH:MM-HH:MM" start-time ranges with >= tables_needed free] } ] } ]
+      }
       error: "...error message..."
     """
     try:
-        db = next(get_db())
-        r = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+        return await run_db(
+            _get_availability_heatmap, restaurant_ids, start_date, days, guests,
+            duration_minutes, from_hour, to_hour,
+        )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        if not r:
-            return {
-                "success": False,
-                "error": f"Restaurant with ID {restaurant_id} not found"
-            }
 
+def _get_restaurant_details_by_id(db, restaurant_id: int) -> Dict[str, Any]:
+    r = fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant_id)
+
+    if not r:
         return {
-            "success": True,
-            "data": {
-                "id": r.id,
-                "name": r.name,
-                "area": r.area,
-                "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
-                "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
-            }
+            "success": False,
+            "error": f"Restaurant with ID {restaurant_id} not found"
         }
 
+    return {
+        "success": True,
+        "data": {
+            "id": r.id,
+            "name": r.name,
+            "area": r.area,
+            "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
+            "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
+        }
+    }
+
+
+@mcp.tool()
+@traced_tool
+async def get_restaurant_details_by_id(restaurant_id: int) -> Dict[str, Any]:
+    """
+    Return necessary details of a restaurant given its restaurant_id.
+
+    Returns:
+      success: True/False
+      data: { id, name, area, cuisines, amenities }
+      error: "...error message..."
+    """
+    try:
+        return await run_cached(STATIC_CACHE_TTL_S, restaurant_id, _get_restaurant_details_by_id, restaurant_id)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _get_restaurants_by_partial_name(db, name_query: str, limit: int = 5) -> Dict[str, Any]:
+    rows = fetch_all(db, queries.RESTAURANTS_BY_NAME, pattern=f"%{name_query}%", limit=limit)
+
+    if not rows:
+        return {
+            "success": False,
+            "error": f"No restaurants found with name matching '{name_query}'"
+        }
+
+    results = []
+    for r in rows:
+        results.append({
+            "id": r.id,
+            "name": r.name,
+            "area": r.area,
+            "latitude": r.latitude,
+            "longitude": r.longitude,
+            "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
+            "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
+        })
+
+    return {
+        "success": True,
+        "data": {
+            "restaurants": results
+        }
+    }
+
+
 @mcp.tool()
-def get_restaurants_by_partial_name(name_query: str, limit: int = 5) -> Dict[str, Any]:
+@traced_tool
+async def get_restaurants_by_partial_name(name_query: str, limit: int = 5) -> Dict[str, Any]:
     """
     Return restaurant IDs matching a partial name search (case-insensitive).
     Useful when the client only knows the restaurant name, not the ID.
@@ -384,69 +704,130 @@ def get_restaurants_by_partial_name(name_query: str, limit: int = 5) -> Dict[str
       error: "...error message..."
     """
     try:
-        db = next(get_db())
-        q = db.query(Restaurant).filter(Restaurant.name.ilike(f"%{name_query}%"))
-        rows = q.limit(limit).all()
+        return await run_cached(STATIC_CACHE_TTL_S, None, _get_restaurants_by_partial_name, name_query, limit)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        if not rows:
-            return {
-                "success": False,
-                "error": f"No restaurants found with name matching '{name_query}'"
-            }
 
-        results = []
-        for r in rows:
-            results.append({
-                "id": r.id,
-                "name": r.name,
-                "area": r.area,
-                "latitude": r.latitude,
-                "longitude": r.longitude,
-                "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
-                "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
-            })
+def _get_restaurants_in_area(db, area_name: str, limit: int = 50) -> Dict[str, Any]:
+    rows = fetch_all(db, queries.RESTAURANTS_BY_AREA, pattern=f"%{area_name}%", limit=limit)
 
-        return {
-            "success": True,
-            "data": {
-                "restaurants": results
-            }
-        }
+    if not rows:
+        return {"success": False, "error": f"No restaurants found in area '{area_name}'"}
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    results = []
+    for r in rows:
+        results.append({
+            "id": r.id,
+            "name": r.name,
+            "area": r.area,
+            "latitude": r.latitude,
+            "longitude": r.longitude,
+            "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
+            "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
+        })
+    return {"success": True, "data": results}
 
 
 @mcp.tool()
-def get_restaurants_in_area(area_name: str, limit: int = 50) -> Dict[str, Any]:
+@traced_tool
+async def get_restaurants_in_area(area_name: str, limit: int = 50) -> Dict[str, Any]:
     """Return list of restaurants in an area (by exact area/area substring match)."""
     try:
-        db = next(get_db())
-        q = db.query(Restaurant).filter(Restaurant.area.ilike(f"%{area_name}%"))
-        rows = q.limit(limit).all()
+        return await run_cached(STATIC_CACHE_TTL_S, None, _get_restaurants_in_area, area_name, limit)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        if not rows:
+
+def _five_nearby_restaurants(
+    db,
+    area_name: Optional[str] = None,
+    restaurant_id: Optional[int] = None,
+    radius_km: float = 10.0
+) -> Dict[str, Any]:
+    if not area_name and not restaurant_id:
+        return {"success": False, "error": "Provide either area_name or restaurant_id"}
+
+    # --- Determine base point (for final distance sorting) ---
+    base_restaurant = None
+    if restaurant_id:
+        base_restaurant = fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant_id)
+        if not base_restaurant:
+            return {"success": False, "error": f"Restaurant ID {restaurant_id} not found"}
+        base_lat, base_lon = base_restaurant.latitude, base_restaurant.longitude
+    else:
+        # If no restaurant_id, pick the first restaurant in the area as base
+        base_restaurant = fetch_one(db, queries.FIRST_RESTAURANT_IN_AREA, pattern=f"%{area_name}%")
+        if not base_restaurant:
             return {"success": False, "error": f"No restaurants found in area '{area_name}'"}
+        base_lat, base_lon = base_restaurant.latitude, base_restaurant.longitude
 
-        results = []
-        for r in rows:
-            results.append({
-                "id": r.id,
-                "name": r.name,
-                "area": r.area,
-                "latitude": r.latitude,
-                "longitude": r.longitude,
-                "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
-                "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
-            })
-        return {"success": True, "data": results}
+    # Determine search centre: use area centroid if area_name provided, else base point
+    if area_name:
+        centre = center_of_area(db, area_name)
+        if not centre.get("success", True):
+            # fallback to base point
+            centre_lat, centre_lon = base_lat, base_lon
+        else:
+            centre_data = centre.get("data", {})
+            centre_lat = centre_data.get("latitude", base_lat)
+            centre_lon = centre_data.get("longitude", base_lon)
+    else:
+        centre_lat, centre_lon = base_lat, base_lon
+
+    # Compute bounding box around centre to approximate radius_km
+    # Approximation: 1 deg latitude ~= 111.32 km
+    lat_deg = radius_km / 111.32
+    # 1 deg longitude ~= 111.32 * cos(lat) km
+    lon_deg = radius_km / (111.32 * max(0.000001, abs(cos(radians(centre_lat)))))
+
+    min_lat, max_lat = centre_lat - lat_deg, centre_lat + lat_deg
+    min_lon, max_lon = centre_lon - lon_deg, centre_lon + lon_deg
+
+    # Query DB for restaurants within bounding box (fast prefilter)
+    candidates = fetch_all(
+        db, queries.RESTAURANTS_IN_BOX, min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon
+    )
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    if not candidates:
+        return {
+            "success": False,
+            "error": f"No nearby restaurants found within {radius_km} km of area '{area_name or 'base location'}'"
+        }
+
+    # --- Compute Haversine distances and sort ---
+    scored: List[Tuple[float, Any]] = []
+    for c in candidates:
+        # skip the base restaurant itself
+        if base_restaurant and c.id == base_restaurant.id:
+            continue
+        d = haversine(base_lat, base_lon, c.latitude, c.longitude)
+        if d <= radius_km:
+            scored.append((d, c))
+
+    if not scored:
+        return {"success": False, "error": f"No restaurants found within {radius_km} km"}
+
+    scored.sort(key=lambda x: x[0])
+
+    # --- Prepare output ---
+    results = []
+    for d, r in scored[:5]:
+        results.append({
+            "id": r.id,
+            "name": r.name,
+            "area": r.area,
+            "distance_km": round(d, 2),
+            "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
+            "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
+        })
+
+    return {"success": True, "data": results}
 
 
 @mcp.tool()
-def five_nearby_restaurants(
+@traced_tool
+async def five_nearby_restaurants(
     area_name: Optional[str] = None,
     restaurant_id: Optional[int] = None,
     radius_km: float = 10.0
@@ -462,171 +843,124 @@ def five_nearby_restaurants(
     - Final results are sorted by Haversine distance to the base.
     """
     try:
-        if not area_name and not restaurant_id:
-            return {"success": False, "error": "Provide either area_name or restaurant_id"}
-
-        db = next(get_db())
-
-        # --- Determine base point (for final distance sorting) ---
-        base_restaurant = None
-        if restaurant_id:
-            base_restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
-            if not base_restaurant:
-                return {"success": False, "error": f"Restaurant ID {restaurant_id} not found"}
-            base_lat, base_lon = base_restaurant.latitude, base_restaurant.longitude
-        else:
-            # If no restaurant_id, pick the first restaurant in the area as base
-            base_restaurant = (
-                db.query(Restaurant)
-                .filter(Restaurant.area.ilike(f"%{area_name}%"))
-                .order_by(Restaurant.id)
-                .first()
-            )
-            if not base_restaurant:
-                return {"success": False, "error": f"No restaurants found in area '{area_name}'"}
-            base_lat, base_lon = base_restaurant.latitude, base_restaurant.longitude
-
-        # Determine search centre: use area centroid if area_name provided, else base point
-        if area_name:
-            centre = center_of_area(area_name)
-            if not centre.get("success", True):
-                # fallback to base point
-                centre_lat, centre_lon = base_lat, base_lon
-            else:
-                centre_data = centre.get("data", {})
-                centre_lat = centre_data.get("latitude", base_lat)
-                centre_lon = centre_data.get("longitude", base_lon)
-        else:
-            centre_lat, centre_lon = base_lat, base_lon
+        return await run_cached(STATIC_CACHE_TTL_S, None, _five_nearby_restaurants, area_name, restaurant_id, radius_km)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        # Compute bounding box around centre to approximate radius_km
-        # Approximation: 1 deg latitude ~= 111.32 km
-        lat_deg = radius_km / 111.32
-        # 1 deg longitude ~= 111.32 * cos(lat) km
-        lon_deg = radius_km / (111.32 * max(0.000001, abs(cos(radians(centre_lat)))))
-
-        min_lat, max_lat = centre_lat - lat_deg, centre_lat + lat_deg
-        min_lon, max_lon = centre_lon - lon_deg, centre_lon + lon_deg
-
-        # Query DB for restaurants within bounding box (fast prefilter)
-        candidates = (
-            db.query(Restaurant)
-            .filter(Restaurant.latitude >= min_lat, Restaurant.latitude <= max_lat)
-            .filter(Restaurant.longitude >= min_lon, Restaurant.longitude <= max_lon)
-            .all()
-        )
 
-        if not candidates:
-            return {
-                "success": False,
-                "error": f"No nearby restaurants found within {radius_km} km of area '{area_name or 'base location'}'"
-            }
+def _latest_5_user_feedback(db, user_id: int) -> Dict[str, Any]:
+    rows = fetch_all(db, queries.LATEST_5_USER_FEEDBACK, user_id=user_id)
 
-        # --- Compute Haversine distances and sort ---
-        scored: List[Tuple[float, Restaurant]] = []
-        for c in candidates:
-            # skip the base restaurant itself
-            if base_restaurant and c.id == base_restaurant.id:
-                continue
-            d = haversine(base_lat, base_lon, c.latitude, c.longitude)
-            if d <= radius_km:
-                scored.append((d, c))
-
-        if not scored:
-            return {"success": False, "error": f"No restaurants found within {radius_km} km"}
-
-        scored.sort(key=lambda x: x[0])
-
-        # --- Prepare output ---
-        results = []
-        for d, r in scored[:5]:
-            results.append({
-                "id": r.id,
-                "name": r.name,
-                "area": r.area,
-                "distance_km": round(d, 2),
-                "cuisines": [c.strip() for c in (r.cuisines or "").split(",") if c.strip()],
-                "amenities": [a.strip() for a in (r.amenities or "").split(",") if a.strip()],
-            })
+    result = []
+    for f in rows:
+        result.append({
+            "feedback_id": f.id,
+            "booking_id": f.booking_id,
+            "user_id": f.user_id,
+            "restaurant_id": f.restaurant_id,
+            "stars": f.stars,
+            "text": f.text,
+            "created_at": dt_to_iso(f.created_at),
+        })
 
-        return {"success": True, "data": results}
-
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return {"success": True, "data": result}
 
 
 @mcp.tool()
-def latest_5_user_feedback(user_id: int) -> Dict[str, Any]:
+@traced_tool
+async def latest_5_user_feedback(user_id: int) -> Dict[str, Any]:
     """
     Return the latest 5 feedback entries for a user.
     Uses booking-based feedback.
     """
     try:
-        db = next(get_db())
-
-        rows = (
-            db.query(Feedback)
-            .filter(Feedback.user_id == user_id)
-            .order_by(Feedback.created_at.desc())
-            .limit(5)
-            .all()
-        )
+        return await run_db(_latest_5_user_feedback, user_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        result = []
-        for f in rows:
-            result.append({
-                "feedback_id": f.id,
-                "booking_id": f.booking_id,
-                "user_id": f.user_id,
-                "restaurant_id": f.restaurant_id,
-                "stars": f.stars,
-                "text": f.text,
-                "created_at": dt_to_iso(f.created_at),
-            })
 
-        return {"success": True, "data": result}
+def _latest_5_restaurant_feedback(db, restaurant_id: int) -> Dict[str, Any]:
+    rows = fetch_all(db, queries.LATEST_5_RESTAURANT_FEEDBACK, restaurant_id=restaurant_id)
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    result = []
+    for f in rows:
+        result.append({
+            "feedback_id": f.id,
+            "booking_id": f.booking_id,
+            "user_id": f.user_id,
+            "restaurant_id": f.restaurant_id,
+            "stars": f.stars,
+            "text": f.text,
+            "created_at": dt_to_iso(f.created_at),
+        })
+
+    return {"success": True, "data": result}
 
 
 @mcp.tool()
-def latest_5_restaurant_feedback(restaurant_id: int) -> Dict[str, Any]:
+@traced_tool
+async def latest_5_restaurant_feedback(restaurant_id: int) -> Dict[str, Any]:
     """
     Return the latest 5 feedback entries for a restaurant.
     Uses booking-based feedback.
     """
     try:
-        db = next(get_db())
-
-        rows = (
-            db.query(Feedback)
-            .filter(Feedback.restaurant_id == restaurant_id)
-            .order_by(Feedback.created_at.desc())
-            .limit(5)
-            .all()
-        )
+        return await run_cached(STATIC_CACHE_TTL_S, restaurant_id, _latest_5_restaurant_feedback, restaurant_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        result = []
-        for f in rows:
-            result.append({
-                "feedback_id": f.id,
-                "booking_id": f.booking_id,
-                "user_id": f.user_id,
-                "restaurant_id": f.restaurant_id,
-                "stars": f.stars,
-                "text": f.text,
-                "created_at": dt_to_iso(f.created_at),
-            })
 
-        return {"success": True, "data": result}
+def _make_reservation_tool(
+    db,
+    user_id: int,
+    restaurant_id: int,
+    start_iso: str,
+    end_iso: Optional[str],
+    guests: int = 1,
+    allow_non_contiguous: bool = False
+) -> Dict[str, Any]:
+    # parse datetimes
+    start_dt = iso_to_dt(start_iso)
+    end_dt = iso_to_dt(end_iso) if end_iso else start_dt + timedelta(hours=2)
+
+    # Basic validation
+    if start_dt >= end_dt:
+        return {"success": False, "error": "Invalid time window: start time must be before end time"}
+    if guests <= 0:
+        return {"success": False, "error": "Invalid guest count"}
+
+    result = allocate_tables_transaction(
+        db,
+        user_id,
+        restaurant_id,
+        start_dt,
+        end_dt,
+        guests,
+        allow_non_contiguous
+    )
+
+    # ---- SUCCESS CASE ----
+    if result.get("success"):
+        OCCUPANCY.mark_booked(restaurant_id, result["table_ids"], start_dt, end_dt)
+        return {
+            "success": True,
+            "data": {
+                "message": result.get("message"),
+                "booking_id": result.get("booking_id"),
+                "reservations": result.get("reservations", [])
+            }
+        }
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    # ---- FAILURE CASE ----
+    return {
+        "success": False,
+        "error": result.get("error") or result.get("message") or "Table Allocation failed. Reservation failed"
+    }
 
 
 @mcp.tool()
-def make_reservation_tool(
+@traced_tool
+async def make_reservation_tool(
     user_id: int,
     restaurant_id: int,
     start_iso: str,
@@ -642,92 +976,124 @@ def make_reservation_tool(
       - error: "..."                                  (on failure)
     """
     try:
-        db = next(get_db())
-
-        # parse datetimes
-        start_dt = iso_to_dt(start_iso)
-        end_dt = iso_to_dt(end_iso) if end_iso else start_dt + timedelta(hours=2)
-
-        # Basic validation
-        if start_dt >= end_dt:
-            return {"success": False, "error": "Invalid time window: start time must be before end time"}
-        if guests <= 0:
-            return {"success": False, "error": "Invalid guest count"}
-
-        result = allocate_tables_transaction(
-            db,
-            user_id,
-            restaurant_id,
-            start_dt,
-            end_dt,
-            guests,
-            allow_non_contiguous
-        )
+        # Serialize bookings per restaurant across concurrent tool calls in this process
+        async with get_restaurant_async_lock(restaurant_id):
+            result = await run_db(_make_reservation_tool, user_id, restaurant_id, start_iso, end_iso, guests, allow_non_contiguous)
+            if result.get("success"):
+                invalidate_restaurant(restaurant_id)
+            return result
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        # ---- SUCCESS CASE ----
-        if result.get("success"):
-            return {
-                "success": True,
-                "data": {
-                    "message": result.get("message"),
-                    "booking_id": result.get("booking_id"),
-                    "reservations": result.get("reservations", [])
-                }
-            }
 
-        # ---- FAILURE CASE ----
-        return {
-            "success": False,
-            "error": result.get("error") or result.get("message") or "Table Allocation failed. Reservation failed"
-        }
+def _cancel_reservation_tool(db, booking_id: int, user_id: int) -> Dict[str, Any]:
+    with db.begin():
+        b = db.query(Booking).filter(Booking.id == booking_id).first()
+        if not b:
+            return {"success": False, "error": "Booking ID not found"}
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+        if b.user_id != user_id:
+            return {"success": False, "error": "User not authorized to cancel this booking"}
+
+        # Capture reservation IDs before deleting
+        deleted_res_ids = [r.id for r in b.reservations]
+        freed_table_ids = [r.table_id for r in b.reservations]
+        restaurant_id, start_dt, end_dt = b.restaurant_id, b.start_dt, b.end_dt
+
+        # Delete booking → cascade deletes reservations
+        db.delete(b)
+
+    # Committed: release the slots in the occupancy bitmaps
+    OCCUPANCY.mark_cancelled(restaurant_id, freed_table_ids, start_dt, end_dt)
+
+    return {
+        "success": True,
+        "data": {
+            "message": "Booking cancelled successfully",
+            "booking_id": booking_id,
+            "restaurant_id": restaurant_id,
+            "reservation_ids": deleted_res_ids
+        }
+    }
 
 
 @mcp.tool()
-def cancel_reservation_tool(booking_id: int, user_id: int) -> Dict[str, Any]:
+@traced_tool
+async def cancel_reservation_tool(booking_id: int, user_id: int) -> Dict[str, Any]:
     """
     Cancel a booking.
     Deletes the Booking + all child Reservations (cascade).
     Returns:
       success: bool
-      data: { message, booking_id, reservation_ids }
+      data: { message, booking_id, restaurant_id, reservation_ids }
       or
       error: "..."
     """
     try:
-        db = next(get_db())
-
-        with db.begin():
-            b = db.query(Booking).filter(Booking.id == booking_id).first()
-            if not b:
-                return {"success": False, "error": "Booking ID not found"}
-
-            if b.user_id != user_id:
-                return {"success": False, "error": "User not authorized to cancel this booking"}
+        result = await run_db(_cancel_reservation_tool, booking_id, user_id)
+        if result.get("success"):
+            invalidate_restaurant(result["data"]["restaurant_id"])
+        return result
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-            # Capture reservation IDs before deleting
-            deleted_res_ids = [r.id for r in b.reservations]
 
-            # Delete booking → cascade deletes reservations
-            db.delete(b)
+def _submit_feedback_tool(
+    db,
+    booking_id: int,
+    user_id: int,
+    stars: int,
+    text: Optional[str] = None
+) -> Dict[str, Any]:
+    # Validate stars
+    if stars < 1 or stars > 5:
+        return {"success": False, "error": "Stars must be between 1 and 5"}
+
+    with db.begin():
+        # Fetch booking
+        b = db.query(Booking).filter(Booking.id == booking_id).first()
+        if not b:
+            return {"success": False, "error": "Booking ID not found"}
+
+        # Verify user owns the booking
+        if b.user_id != user_id:
+            return {"success": False, "error": "User not authorized to submit feedback for this booking"}
+
+        # If feedback already exists, update it
+        if b.feedback:
+            f = b.feedback
+            f.stars = stars
+            f.text = text
+            f.created_at = now_ist()
+
+        # Else create new feedback
+        else:
+            f = Feedback(
+                user_id=b.user_id,
+                restaurant_id=b.restaurant_id,
+                booking_id=b.id,
+                stars=stars,
+                text=text,
+                created_at=now_ist()
+            )
+            db.add(f)
 
-            return {
-                "success": True,
-                "data": {
-                    "message": "Booking cancelled successfully",
-                    "booking_id": booking_id,
-                    "reservation_ids": deleted_res_ids
-                }
+        # Auto-committed by db.begin()
+        return {
+            "success": True,
+            "data": {
+                "message": "Feedback submitted successfully",
+                "booking_id": booking_id,
+                "restaurant_id": b.restaurant_id,
+                "stars": stars,
+                "text": text
             }
-    
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+        }
 
 
 @mcp.tool()
-def submit_feedback_tool(
+@traced_tool
+async def submit_feedback_tool(
     booking_id: int,
     user_id: int,
     stars: int,
@@ -742,60 +1108,28 @@ def submit_feedback_tool(
       success: False, error: "..."
     """
     try:
-        db = next(get_db())
-
-        # Validate stars
-        if stars < 1 or stars > 5:
-            return {"success": False, "error": "Stars must be between 1 and 5"}
-
-        with db.begin():
-            # Fetch booking
-            b = db.query(Booking).filter(Booking.id == booking_id).first()
-            if not b:
-                return {"success": False, "error": "Booking ID not found"}
-
-            # Verify user owns the booking
-            if b.user_id != user_id:
-                return {"success": False, "error": "User not authorized to submit feedback for this booking"}
-
-            # If feedback already exists, update it
-            if b.feedback:
-                f = b.feedback
-                f.stars = stars
-                f.text = text
-                f.created_at = now_ist()
-
-            # Else create new feedback
-            else:
-                f = Feedback(
-                    user_id=b.user_id,
-                    restaurant_id=b.restaurant_id,
-                    booking_id=b.id,
-                    stars=stars,
-                    text=text,
-                    created_at=now_ist()
-                )
-                db.add(f)
-
-            # Auto-committed by db.begin()
-            return {
-                "success": True,
-                "data": {
-                    "message": "Feedback submitted successfully",
-                    "booking_id": booking_id,
-                    "stars": stars,
-                    "text": text
-                }
-            }
-
+        result = await run_db(_submit_feedback_tool, booking_id, user_id, stars, text)
+        if result.get("success"):
+            invalidate_restaurant(result["data"]["restaurant_id"])
+        return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 # simple getters for amenities/cuisines and universal lists
 
+def _get_rating_for_restaurant(db, restaurant_id: int) -> Dict[str, Any]:
+    r = fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant_id)
+
+    if not r:
+        return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
+
+    return {"success": True, "data": {"rating": r.rating}}
+
+
 @mcp.tool()
-def get_rating_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
+@traced_tool
+async def get_rating_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
     """
     Return the rating of the given restaurant.
     Returns standardized JSON:
@@ -804,19 +1138,26 @@ def get_rating_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
       - error: "..." on failure
     """
     try:
-        db = next(get_db())
-        r = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+        return await run_cached(STATIC_CACHE_TTL_S, restaurant_id, _get_rating_for_restaurant, restaurant_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        if not r:
-            return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
+def _get_amenities_for_restaurant(db, restaurant_id: int) -> Dict[str, Any]:
+    r = fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant_id)
 
-        return {"success": True, "data": {"rating": r.rating}}
+    if not r:
+        return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
+
+    if not r.amenities:
+        return {"success": True, "data": {"amenities": []}}
+
+    amenities = [a.strip() for a in r.amenities.split(",") if a.strip()]
+    return {"success": True, "data": {"amenities": amenities}}
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
 
 @mcp.tool()
-def get_amenities_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
+@traced_tool
+async def get_amenities_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
     """
     Return the list of amenities for a given restaurant.
     Returns standardized JSON:
@@ -825,24 +1166,27 @@ def get_amenities_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
       - error: "..." on failure
     """
     try:
-        db = next(get_db())
-        r = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+        return await run_cached(STATIC_CACHE_TTL_S, restaurant_id, _get_amenities_for_restaurant, restaurant_id)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        if not r:
-            return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
 
-        if not r.amenities:
-            return {"success": True, "data": {"amenities": []}}
+def _get_cuisines_for_restaurant(db, restaurant_id: int) -> Dict[str, Any]:
+    r = fetch_one(db, queries.RESTAURANT_BY_ID, restaurant_id=restaurant_id)
 
-        amenities = [a.strip() for a in r.amenities.split(",") if a.strip()]
-        return {"success": True, "data": {"amenities": amenities}}
+    if not r:
+        return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    if not r.cuisines:
+        return {"success": True, "data": {"cuisines": []}}
+
+    cuisines = [c.strip() for c in r.cuisines.split(",") if c.strip()]
+    return {"success": True, "data": {"cuisines": cuisines}}
 
 
 @mcp.tool()
-def get_cuisines_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
+@traced_tool
+async def get_cuisines_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
     """
     Return the list of cuisines for a given restaurant.
     Returns standardized JSON:
@@ -851,23 +1195,13 @@ def get_cuisines_for_restaurant(restaurant_id: int) -> Dict[str, Any]:
       - error: "..." on failure
     """
     try:
-        db = next(get_db())
-        r = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
-
-        if not r:
-            return {"success": False, "error": f"Restaurant with ID {restaurant_id} not found"}
-
-        if not r.cuisines:
-            return {"success": True, "data": {"cuisines": []}}
-
-        cuisines = [c.strip() for c in r.cuisines.split(",") if c.strip()]
-        return {"success": True, "data": {"cuisines": cuisines}}
-
+        return await run_cached(STATIC_CACHE_TTL_S, restaurant_id, _get_cuisines_for_restaurant, restaurant_id)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 @mcp.tool()
+@traced_tool
 def get_all_amenities() -> Dict[str, Any]:
     """
     Return the canonical list of all possible amenities.
@@ -893,6 +1227,7 @@ def get_all_amenities() -> Dict[str, Any]:
 
 
 @mcp.tool()
+@traced_tool
 def get_all_cuisines() -> Dict[str, Any]:
     """
     Return the canonical list of all possible cuisines.
@@ -918,9 +1253,47 @@ def get_all_cuisines() -> Dict[str, Any]:
 # End of tool definitions
 # -------------------------------------------------------------
 
+# --------------------------- Metrics ---------------------------
+# Served next to /mcp when the server runs over HTTP (custom routes are not used over stdio).
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request):
+    """Prometheus scrape endpoint, including mcp_single_flight_calls_total."""
+    from starlette.responses import PlainTextResponse
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.custom_route("/metrics/single-flight", methods=["GET"])
+async def single_flight_stats_endpoint(request):
+    """SINGLE_FLIGHT.stats(): totals plus the most coalesced keys."""
+    from starlette.responses import JSONResponse
+    return JSONResponse(SINGLE_FLIGHT.stats(top=int(request.query_params.get("top", "20"))))
+
+if __name__ != "__main__":
+    load_db_layer()
+
 # if __name__ == "__main__":
 #     import asyncio
 #     asyncio.run(mcp.run(transport="stdio"))
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reservation MCP tool server.")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http", "sse"], default="stdio",
+                        help="stdio (child of the API process) or a network server that several API workers share")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--stateful", action="store_true",
+                        help="keep MCP sessions on the server (a little faster per call, but clients must stick to one replica)")
+    args = parser.parse_args()
+
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        # Stateless by default: no per-client session on the server, so any replica can answer any request
+        mcp.settings.stateless_http = not args.stateful
+        mcp.settings.json_response = True
+        mcp.settings.log_level = "WARNING"  # no access log line per tool call
+    # Overlaps the client's initialize / tools/list (and its first LLM call) instead of delaying them
+    Thread(target=load_db_layer, name="load-db-layer", daemon=True).start()
+    mcp.run(transport=args.transport)
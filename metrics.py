@@ -0,0 +1,231 @@
+# metrics.py
+"""
+In-process metrics rendered in the Prometheus text exposition format (GET /metrics).
+
+Deliberately dependency-free: Counter, Gauge (set/inc/dec or a callback) and
+Histogram with labels, kept in a module-level registry. Values are per process;
+with several API workers, scrape each one.
+
+The metric objects used across the app are defined at the bottom of this module.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_INF_LE = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set_function(self, callback: Callable[[], float]):
+        """Read the value from `callback` at scrape time (unlabelled gauges only)."""
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        if self._callback is not None:
+            return [f"{self.name} {_fmt_value(self._callback())}"]
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of the enclosed block."""
+        return _Timer(self, labels)
+
+    def _samples(self):
+        lines = []
+        for key, row in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, row):
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(count)}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, _INF_LE)} {_fmt_value(row[-1])}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-1])}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------- active conversations ---------------------------
+
+ACTIVE_CONVERSATION_WINDOW_S = 15 * 60
+_last_seen: Dict[str, float] = {}
+
+
+def touch_conversation(key: str):
+    """Mark a conversation as active now (counts towards chat_active_conversations)."""
+    _last_seen[key] = time.monotonic()
+
+
+def _active_conversations() -> int:
+    cutoff = time.monotonic() - ACTIVE_CONVERSATION_WINDOW_S
+    for key in [k for k, t in _last_seen.items() if t < cutoff]:
+        _last_seen.pop(key, None)
+    return len(_last_seen)
+
+
+# --------------------------- app metrics ---------------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "path", "status"])
+CHAT_TURNS_IN_PROGRESS = Gauge(
+    "chat_turns_in_progress", "Chat turns currently being processed")
+CHAT_ACTIVE_CONVERSATIONS = Gauge(
+    "chat_active_conversations", "Conversations with a turn in the last 15 minutes",
+    callback=_active_conversations)
+LLM_ROUND_TRIPS_PER_TURN = Histogram(
+    "chat_llm_round_trips_per_turn", "chat.completions calls per chat turn",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30))
+LLM_COMPLETION_DURATION = Histogram(
+    "llm_completion_duration_seconds", "chat.completions round-trip latency", ["model"])
+LLM_ROUTE_DURATION = Histogram(
+    "llm_route_duration_seconds", "chat.completions latency by routing decision (primary / fast)", ["route"])
+LLM_ROUTE_ESCALATIONS = Counter(
+    "llm_route_escalations_total", "Fast-model hops that answered the user and were redone on the primary model", ["hop"])
+LLM_COST = Counter(
+    "llm_cost_usd_total", "Completion cost from LLM_PRICES, by route and model", ["route", "model"])
+LLM_BUDGET_EXHAUSTED = Counter(
+    "chat_turn_budget_exhausted_total", "Chat turns cut short by a per-turn budget", ["budget"])
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported in completion usage", ["model", "type"])
+LLM_UPSTREAM_REQUESTS = Counter(
+    "llm_upstream_requests_total", "chat.completions requests per upstream (ok / retryable_error / error)",
+    ["upstream", "outcome"])
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total", "Completions that sent a hedge request, by which one answered", ["outcome"])
+LLM_TOOL_RESULT_TOKENS = Counter(
+    "llm_tool_result_tokens_total", "Tool result tokens as returned by the tool (original) and as sent to the LLM (sent)",
+    ["tool", "form"])
+TOOL_PREFETCH = Counter(
+    "agent_tool_prefetch_total", "Speculative tool calls the turn used (hit) or dropped (waste)", ["tool", "outcome"])
+TOOL_CALLS = Counter(
+    "mcp_tool_calls_total", "MCP tool calls by tool and outcome", ["tool", "outcome"])
+TOOL_CALL_DURATION = Histogram(
+    "mcp_tool_call_duration_seconds", "MCP tool call latency as seen by the agent", ["tool"])
+SINGLE_FLIGHT_CALLS = Counter(
+    "mcp_single_flight_calls_total", "Read tool calls that ran the query (leader) or joined one in flight (shared)",
+    ["tool", "role"])
+SINGLE_FLIGHT_IN_FLIGHT = Gauge(
+    "mcp_single_flight_in_flight", "Read tool queries currently running that later identical calls can join")
+RESERVATION_ATTEMPTS = Counter(
+    "reservation_attempts_total", "make_reservation_tool outcomes (success / conflict / error)", ["outcome"])
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out",
+    "Connections checked out of the pool serving tool queries (tool server, or the API with MCP_TRANSPORT=inprocess)")
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured size of the pool serving tool queries")
@@ -0,0 +1,172 @@
+# migrations.py
+"""
+Idempotent schema migrations, safe to run on every startup.
+
+- Creates missing tables (and their indexes) via create_all (checkfirst).
+- Adds columns that exist in models.py but not yet in the database.
+- Backfills denormalized columns added after the table was first created.
+- Rebuilds SQLite tables that models.py marks sqlite_autoincrement but were
+  created without it (SQLite cannot add AUTOINCREMENT in place).
+- Creates missing named indexes on existing tables.
+- Drops the indexes listed in DROPPED_INDEXES that are no longer in models.py.
+
+No table or column is dropped; existing rows are preserved. Every step inspects
+the live schema first, so a second run is a no-op.
+
+Run:
+    python migrations.py
+"""
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.schema import CreateTable
+from database import engine as default_engine
+from models import Base
+
+# Backfills for columns added to existing tables: (table, column) -> UPDATE statement
+BACKFILLS = {
+    # reservations carry a copy of the booking window (see models.Reservation)
+    ("reservations", "start_dt"): (
+        "UPDATE reservations SET start_dt = "
+        "(SELECT bookings.start_dt FROM bookings WHERE bookings.id = reservations.booking_id) "
+        "WHERE start_dt IS NULL"
+    ),
+    ("reservations", "end_dt"): (
+        "UPDATE reservations SET end_dt = "
+        "(SELECT bookings.end_dt FROM bookings WHERE bookings.id = reservations.booking_id) "
+        "WHERE end_dt IS NULL"
+    ),
+    # archive rows got their own ids; rows archived before that kept the live id as theirs
+    ("bookings_archive", "source_id"): "UPDATE bookings_archive SET source_id = id WHERE source_id IS NULL",
+    ("reservations_archive", "source_id"): "UPDATE reservations_archive SET source_id = id WHERE source_id IS NULL",
+}
+
+# Indexes removed from models.py, dropped where an earlier migration created them: (table, index)
+DROPPED_INDEXES = [
+    # superseded by ix_reservation_table_window once availability stopped joining bookings
+    ("bookings", "ix_booking_restaurant_window"),
+]
+
+# Archive tables whose source_id holds ids of a live table: a rebuilt live table
+# starts its AUTOINCREMENT sequence above them, so archived ids are not handed out again
+ARCHIVED_IDS = {
+    "bookings": ("bookings_archive", "source_id"),
+    "reservations": ("reservations_archive", "source_id"),
+}
+
+
+def _add_missing_columns(conn, inspector) -> list:
+    added = []
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            # Added as NULLable: SQLite cannot add a NOT NULL column without a default,
+            # and existing rows get their value from BACKFILLS.
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+            backfill = BACKFILLS.get((table.name, column.name))
+            if backfill:
+                conn.execute(text(backfill))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _rebuild_for_autoincrement(conn, inspector) -> list:
+    if conn.dialect.name != "sqlite":
+        return []  # other databases' sequences never hand out an id twice
+    rebuilt = []
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables or not table.dialect_options["sqlite"]["autoincrement"]:
+            continue
+        ddl = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+        ).scalar()
+        if "AUTOINCREMENT" in ddl.upper():
+            continue
+        # SQLite's documented table rebuild: copy into a new table, drop the old one, rename.
+        # Its indexes are dropped with it and recreated by _create_missing_indexes.
+        new_name = f"{table.name}_rebuild"
+        conn.execute(text(f"DROP TABLE IF EXISTS {new_name}"))
+        scratch = MetaData()  # holds the tables the copy's foreign keys refer to
+        for other in Base.metadata.sorted_tables:
+            other.to_metadata(scratch)
+        conn.execute(CreateTable(table.to_metadata(scratch, name=new_name)))
+        columns = ", ".join(c.name for c in table.columns)
+        conn.execute(text(f"INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}"))
+        conn.execute(text(f"DROP TABLE {table.name}"))
+        conn.execute(text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+        archive = ARCHIVED_IDS.get(table.name)
+        if archive and archive[0] in existing_tables:
+            floor = conn.execute(text(f"SELECT MAX({archive[1]}) FROM {archive[0]}")).scalar() or 0
+            conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+            conn.execute(
+                text(f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, MAX(COALESCE(MAX(id), 0), :floor) "
+                     f"FROM {table.name}"),
+                {"name": table.name, "floor": floor},
+            )
+        rebuilt.append(table.name)
+    return rebuilt
+
+
+def _create_missing_indexes(conn, inspector) -> list:
+    created = []
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(bind=conn)
+                created.append(index.name)
+    return created
+
+
+def _drop_unused_indexes(conn, inspector) -> list:
+    dropped = []
+    existing_tables = set(inspector.get_table_names())
+    for table_name, index_name in DROPPED_INDEXES:
+        if table_name not in existing_tables:
+            continue
+        if index_name in {ix["name"] for ix in inspector.get_indexes(table_name)}:
+            conn.execute(text(f"DROP INDEX {index_name}"))
+            dropped.append(index_name)
+    return dropped
+
+
+def run_migrations(engine=None) -> dict:
+    """
+    Bring the database schema up to date with models.py without touching data.
+
+    Returns:
+        { created_tables: [...], added_columns: [...], rebuilt_tables: [...],
+          created_indexes: [...], dropped_indexes: [...] }
+    """
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        before = set(inspector.get_table_names())
+        added_columns = _add_missing_columns(conn, inspector)
+        rebuilt_tables = _rebuild_for_autoincrement(conn, inspector)
+        if rebuilt_tables:
+            inspector = inspect(conn)  # cached indexes of the rebuilt tables are gone
+        created_indexes = _create_missing_indexes(conn, inspector)
+        dropped_indexes = _drop_unused_indexes(conn, inspector)
+        Base.metadata.create_all(bind=conn)
+        created_tables = sorted(set(inspect(conn).get_table_names()) - before)
+
+    return {
+        "created_tables": created_tables,
+        "added_columns": added_columns,
+        "rebuilt_tables": rebuilt_tables,
+        "created_indexes": created_indexes,
+        "dropped_indexes": dropped_indexes,
+    }
+
+
+if __name__ == "__main__":
+    print(run_migrations())
@@ -3,11 +3,30 @@ from sqlalchemy import (
     Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Index
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from database import Base
 
 # Define IST timezone
 IST = timezone(timedelta(hours=5, minutes=30))
 
+
+class ISTDateTime(TypeDecorator):
+    """
+    Naive DateTime column holding IST wall-clock time.
+
+    The tools bind IST-aware datetimes (iso_to_dt, now_ist). SQLite and psycopg2
+    drop the offset, but asyncpg rejects aware values for a TIMESTAMP WITHOUT TIME
+    ZONE column, so aware values are converted to naive IST before binding. Values
+    read back are naive IST, as before.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(IST).replace(tzinfo=None)
+        return value
+
 # =====================================================
 # RESTAURANT
 # =====================================================
@@ -22,7 +41,7 @@ class Restaurant(Base):
     rating = Column(Float, default=0.0)
     amenities = Column(String, nullable=True)  # comma-separated amenities
 #    daily_specials = Column(JSON, nullable=True)  # JSON dict: {"Monday": "Dish, Dish", ...}
-    created_at = Column(DateTime, default=lambda: datetime.now(IST))
+    created_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
 
     tables = relationship("RestaurantTable", back_populates="restaurant", cascade="all, delete-orphan")
     bookings = relationship("Booking", back_populates="restaurant", cascade="all, delete-orphan")
@@ -50,7 +69,7 @@ class User(Base):
     name = Column(String, nullable=True)
     phone = Column(String, unique=True, nullable=False, index=True)
     email = Column(String, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(IST))
+    created_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
 
     bookings = relationship("Booking", back_populates="user", cascade="all, delete-orphan")
     feedbacks = relationship("Feedback", back_populates="user", cascade="all, delete-orphan")
@@ -60,16 +79,18 @@ class User(Base):
 # =====================================================
 class Booking(Base):
     __tablename__ = "bookings"
+    # Never reuse the id of a deleted (archived) row: bookings_archive.source_id keeps it
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False, index=True)
 
-    start_dt = Column(DateTime, nullable=False)
-    end_dt = Column(DateTime, nullable=False)
+    start_dt = Column(ISTDateTime, nullable=False)
+    end_dt = Column(ISTDateTime, nullable=False)
     guests = Column(Integer, nullable=False)
     status = Column(String, default="confirmed")
-    created_at = Column(DateTime, default=lambda: datetime.now(IST))
+    created_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
 
     user = relationship("User", back_populates="bookings")
     restaurant = relationship("Restaurant", back_populates="bookings")
@@ -77,16 +98,22 @@ class Booking(Base):
     feedback = relationship("Feedback", back_populates="booking", uselist=False, cascade="all, delete-orphan")
 
 # =====================================================
-# RESERVATION (CHILD) - ONLY TABLE ASSIGNMENT
+# RESERVATION (CHILD) - TABLE ASSIGNMENT
 # =====================================================
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = {"sqlite_autoincrement": True}  # see Booking
     id = Column(Integer, primary_key=True, index=True)
 
     booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False, index=True)
     table_id = Column(Integer, ForeignKey("restaurant_tables.id"), nullable=False, index=True)
 
-    created_at = Column(DateTime, default=lambda: datetime.now(IST))
+    # Copy of the parent booking's window so availability checks never join bookings.
+    # Written together with the booking; rows are removed with it on cancel.
+    start_dt = Column(ISTDateTime, nullable=False)
+    end_dt = Column(ISTDateTime, nullable=False)
+
+    created_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
 
     booking = relationship("Booking", back_populates="reservations")
     table = relationship("RestaurantTable", back_populates="reservations")
@@ -104,16 +131,55 @@ class Feedback(Base):
 
     stars = Column(Integer, nullable=True)
     text = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(IST))
+    created_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
 
     user = relationship("User", back_populates="feedbacks")
     restaurant = relationship("Restaurant", back_populates="feedbacks")
     booking = relationship("Booking", back_populates="feedback")
 
+# =====================================================
+# ARCHIVE (COMPLETED BOOKINGS MOVED OUT OF THE LIVE TABLES)
+# =====================================================
+# Same columns as the live tables plus archived_at. No foreign keys: archived
+# reservations may point at archived bookings or at bookings kept live because
+# feedback references them. See archive.py.
+# Each archive row has its own id; source_id is the live row's id. Live ids are not
+# reused (AUTOINCREMENT on SQLite), so source_id identifies the row it was moved from.
+class ArchivedBooking(Base):
+    __tablename__ = "bookings_archive"
+    id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True)  # bookings.id
+    user_id = Column(Integer, nullable=False, index=True)
+    restaurant_id = Column(Integer, nullable=False, index=True)
+    start_dt = Column(ISTDateTime, nullable=False)
+    end_dt = Column(ISTDateTime, nullable=False)
+    guests = Column(Integer, nullable=False)
+    status = Column(String, default="completed")
+    created_at = Column(ISTDateTime)
+    archived_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
+
+
+class ArchivedReservation(Base):
+    __tablename__ = "reservations_archive"
+    id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True)  # reservations.id
+    booking_id = Column(Integer, nullable=False, index=True)  # bookings_archive.source_id or bookings.id
+    table_id = Column(Integer, nullable=False)
+    start_dt = Column(ISTDateTime, nullable=False)
+    end_dt = Column(ISTDateTime, nullable=False)
+    created_at = Column(ISTDateTime)
+    archived_at = Column(ISTDateTime, default=lambda: datetime.now(IST))
+
 # =====================================================
 # INDEXES
 # =====================================================
 Index('ix_reservation_booking_table', Reservation.booking_id, Reservation.table_id)
+# Availability overlap probe: per table, seek reservations that end after the
+# requested start (end_dt leads so past reservations are skipped by the range scan),
+# then filter start_dt from the index without touching the table.
+Index('ix_reservation_table_window', Reservation.table_id, Reservation.end_dt, Reservation.start_dt)
+# Retention scan (archive.py): reservations that ended before the cutoff, across all tables
+Index('ix_reservation_end', Reservation.end_dt)
 Index('ix_feedback_restaurant_created', Feedback.restaurant_id, Feedback.created_at)
 Index('ix_feedback_user_created', Feedback.user_id, Feedback.created_at)
 Index('ix_restauranttable_restaurant', RestaurantTable.restaurant_id)
@@ -0,0 +1,264 @@
+# occupancy.py
+"""
+Slot-quantized table occupancy for availability checks.
+
+A restaurant's day is cut into 96 slots of 15 minutes (the granularity
+check_availability_for_restaurant works in). For each table the day is one
+Python int used as a 96-bit bitmap: bit i is set when any reservation on that
+table overlaps slot i. A restaurant-day is loaded with one indexed query, then kept
+up to date by bookings and cancellations, so "how many tables are free for this
+window, and at which of the next starts" becomes shifts and ANDs instead of one
+overlap query per candidate start.
+
+For a window that starts and ends on slot boundaries, the bitmap answer is exact.
+Windows that don't are answered by SQL (free_table_counts returns None). Booking
+itself always re-checks in SQL inside its transaction, so a stale bitmap can only
+affect what availability reports, never produce a double booking.
+
+Footprint: ~12 bytes of bitmap per table per day (about 40 bytes as a Python int),
+so a city of 5000 restaurants x 15 tables is a few MB per day.
+
+Times are compared as IST wall-clock times, the way they are stored.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from queries import RESERVATIONS_IN_WINDOW, TABLE_IDS_OF_RESTAURANT, TABLES_OF_RESTAURANTS, fetch_all
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SLOT = timedelta(minutes=15)
+SLOTS_PER_DAY = 96
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+
+def _wall(dt: datetime) -> datetime:
+    """IST wall-clock time without tzinfo (naive values are already IST)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(IST).replace(tzinfo=None)
+    return dt
+
+
+def is_aligned(dt: datetime) -> bool:
+    dt = _wall(dt)
+    return dt.second == 0 and dt.microsecond == 0 and dt.minute % 15 == 0
+
+
+def _slot_of(dt: datetime, day: date) -> float:
+    """Position of `dt` in slots from the start of `day` (fractional when unaligned)."""
+    return (_wall(dt) - datetime.combine(day, datetime.min.time())) / SLOT
+
+
+def _span_mask(first: int, last: int) -> int:
+    """Bits first..last-1, clipped to one day."""
+    first, last = max(first, 0), min(last, SLOTS_PER_DAY)
+    if first >= last:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def window_fit_counts(table_bits: Sequence[int], span: int, n: int, positions: Sequence[int]) -> List[int]:
+    """
+    For bitmaps covering `span` slots, count per position p the tables whose slots
+    p..p+n-1 are all free.
+    """
+    full = (1 << span) - 1
+    in_range = (1 << max(span - n + 1, 0)) - 1
+    counts = [0] * len(positions)
+    for busy in table_bits:
+        free = ~busy & full
+        # bit p of `fits` set <=> slots p..p+n-1 are all free
+        fits = free
+        for k in range(1, n):
+            fits &= free >> k
+        fits &= in_range
+        for j, p in enumerate(positions):
+            counts[j] += (fits >> p) & 1
+    return counts
+
+
+def load_range(db, restaurant_ids: Sequence[int], first_day: date, n_days: int) -> Dict[int, Tuple[Tuple[int, ...], List[int]]]:
+    """
+    Occupancy of several restaurants over n_days consecutive days, read in one pass:
+    one query for the tables, one range query for their reservations.
+    Returns {restaurant_id: (table_ids, bitmaps)} with bit i = slot i from first_day 00:00.
+    """
+    out: Dict[int, Tuple[Tuple[int, ...], List[int]]] = {rid: ((), []) for rid in restaurant_ids}
+    rows = fetch_all(db, TABLES_OF_RESTAURANTS, restaurant_ids=list(restaurant_ids))
+    where = {}
+    for rid, tid in rows:
+        table_ids, bits = out[rid]
+        out[rid] = (table_ids + (tid,), bits + [0])
+        where[tid] = (rid, len(table_ids))
+    if not where:
+        return out
+
+    span = SLOTS_PER_DAY * n_days
+    range_start = datetime.combine(first_day, datetime.min.time(), tzinfo=IST)
+    reservations = fetch_all(
+        db, RESERVATIONS_IN_WINDOW,
+        table_ids=list(where), start_dt=range_start, end_dt=range_start + timedelta(days=n_days),
+    )
+    for table_id, start_dt, end_dt in reservations:
+        first = max(int(_slot_of(start_dt, first_day) // 1), 0)
+        last = min(-int(-_slot_of(end_dt, first_day) // 1), span)
+        if first < last:
+            rid, i = where[table_id]
+            out[rid][1][i] |= ((1 << (last - first)) - 1) << first
+    return out
+
+
+class _Day:
+    __slots__ = ("table_ids", "bits", "built_at")
+
+    def __init__(self, table_ids: Tuple[int, ...], bits: List[int]):
+        self.table_ids = table_ids
+        self.bits = bits
+        self.built_at = time.monotonic()
+
+
+class OccupancyIndex:
+    def __init__(self, ttl_s: float = 30.0):
+        # Rebuilt after ttl_s so bookings made by other processes show up
+        self.ttl_s = ttl_s
+        self._days: Dict[Tuple[int, date], _Day] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+        self.loads = 0
+        self.queries = 0
+
+    # ---------------- loading ----------------
+
+    def _load(self, db, restaurant_id: int, day: date) -> _Day:
+        table_ids = tuple(tid for (tid,) in fetch_all(db, TABLE_IDS_OF_RESTAURANT, restaurant_id=restaurant_id))
+        position = {tid: i for i, tid in enumerate(table_ids)}
+        bits = [0] * len(table_ids)
+        day_start = datetime.combine(day, datetime.min.time(), tzinfo=IST)
+        if table_ids:
+            rows = fetch_all(
+                db, RESERVATIONS_IN_WINDOW,
+                table_ids=list(table_ids), start_dt=day_start, end_dt=day_start + timedelta(days=1),
+            )
+            for table_id, start_dt, end_dt in rows:
+                first = int(_slot_of(start_dt, day) // 1)
+                last = -int(-_slot_of(end_dt, day) // 1)  # ceil
+                bits[position[table_id]] |= _span_mask(first, last)
+        self.loads += 1
+        return _Day(table_ids, bits)
+
+    def _get_day(self, db, restaurant_id: int, day: date) -> _Day:
+        key = (restaurant_id, day)
+        with self._lock:
+            entry = self._days.get(key)
+            generation = self._generations.get(restaurant_id, 0)
+        if entry is not None and time.monotonic() - entry.built_at < self.ttl_s:
+            return entry
+        entry = self._load(db, restaurant_id, day)
+        with self._lock:
+            # A booking/cancel that landed while we were reading makes this load stale
+            if self._generations.get(restaurant_id, 0) == generation:
+                self._days[key] = entry
+            self._prune()
+        return entry
+
+    def _prune(self):
+        """Drop expired days and days before today, at most once per ttl_s (caller holds the lock)."""
+        now = time.monotonic()
+        if now - self._pruned_at < self.ttl_s:
+            return
+        self._pruned_at = now
+        today = datetime.now(IST).date()
+        for key in [k for k, d in self._days.items() if k[1] < today or now - d.built_at >= self.ttl_s]:
+            del self._days[key]
+
+    # ---------------- queries ----------------
+
+    def free_table_counts(self, db, restaurant_id: int, starts: Sequence[datetime], length: timedelta) -> Optional[List[int]]:
+        """
+        Number of tables free for the whole window [s, s + length) for each s in `starts`.
+        Returns None when a window is not slot-aligned; the caller should use SQL then.
+        """
+        if not starts or length <= timedelta(0) or length % SLOT or not all(is_aligned(s) for s in starts):
+            return None
+
+        self.queries += 1
+        first_day = _wall(min(starts)).date()
+        last_day = (_wall(max(starts)) + length - timedelta(microseconds=1)).date()
+        days = [self._get_day(db, restaurant_id, first_day + timedelta(days=i))
+                for i in range((last_day - first_day).days + 1)]
+        table_ids = days[0].table_ids
+        if any(d.table_ids != table_ids for d in days[1:]):
+            return None  # tables changed between loads; let SQL answer
+
+        table_bits = []
+        for t in range(len(table_ids)):
+            busy = 0
+            for i, d in enumerate(days):
+                busy |= d.bits[t] << (SLOTS_PER_DAY * i)
+            table_bits.append(busy)
+        positions = [int(_slot_of(s, first_day)) for s in starts]
+        return window_fit_counts(table_bits, SLOTS_PER_DAY * len(days), int(length / SLOT), positions)
+
+    # ---------------- maintenance ----------------
+
+    def _touched_days(self, restaurant_id: int, start_dt: datetime, end_dt: datetime):
+        day = _wall(start_dt).date()
+        last = (_wall(end_dt) - timedelta(microseconds=1)).date()
+        while day <= last:
+            yield (restaurant_id, day)
+            day += timedelta(days=1)
+
+    def mark_booked(self, restaurant_id: int, table_ids: Iterable[int], start_dt: datetime, end_dt: datetime):
+        """Set the slots of a new booking on its tables (loaded days only)."""
+        table_ids = list(table_ids)
+        with self._lock:
+            self._generations[restaurant_id] = self._generations.get(restaurant_id, 0) + 1
+            for key in self._touched_days(restaurant_id, start_dt, end_dt):
+                entry = self._days.get(key)
+                if entry is None:
+                    continue
+                if any(tid not in entry.table_ids for tid in table_ids):
+                    del self._days[key]
+                    continue
+                day = key[1]
+                mask = _span_mask(int(_slot_of(start_dt, day) // 1), -int(-_slot_of(end_dt, day) // 1))
+                for tid in table_ids:
+                    entry.bits[entry.table_ids.index(tid)] |= mask
+
+    def mark_cancelled(self, restaurant_id: int, table_ids: Iterable[int], start_dt: datetime, end_dt: datetime):
+        """
+        Clear the slots of a cancelled booking. Tables never hold overlapping reservations,
+        so slots the booking fully covered were its own; a partially covered edge slot may
+        be shared with a neighbour, in which case the day is dropped and reloaded.
+        """
+        table_ids = list(table_ids)
+        aligned = is_aligned(start_dt) and is_aligned(end_dt)
+        with self._lock:
+            self._generations[restaurant_id] = self._generations.get(restaurant_id, 0) + 1
+            for key in self._touched_days(restaurant_id, start_dt, end_dt):
+                entry = self._days.get(key)
+                if entry is None:
+                    continue
+                if not aligned or any(tid not in entry.table_ids for tid in table_ids):
+                    del self._days[key]
+                    continue
+                day = key[1]
+                mask = _span_mask(int(_slot_of(start_dt, day)), int(_slot_of(end_dt, day)))
+                for tid in table_ids:
+                    entry.bits[entry.table_ids.index(tid)] &= ~mask & DAY_MASK
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+
+    def stats(self) -> dict:
+        tables = sum(len(d.table_ids) for d in self._days.values())
+        return {
+            "restaurant_days": len(self._days),
+            "table_days": tables,
+            "bitmap_bytes": tables * SLOTS_PER_DAY // 8,
+            "loads": self.loads,
+            "queries": self.queries,
+        }
@@ -0,0 +1,139 @@
+# prefetch.py
+"""
+Speculative prefetch of the tool calls the prompt's flows make next.
+
+The flows in reservation_agent_prompt.md are predictable once a tool result is
+in: an area / nearby search is followed by an availability check per listed
+restaurant, and an available restaurant is followed by get_restaurant_details_by_id.
+While the LLM is still working out that next step, TurnPrefetcher starts those
+calls on the same tool session. When the model then asks for one of them, the
+agent takes the running (or finished) call instead of starting a new one.
+
+Rules (only read-only tools, arguments fully known):
+- check_availability_for_restaurant says a restaurant is available
+      -> get_restaurant_details_by_id(restaurant_id)
+- the model checks availability one restaurant per step after an area / nearby search
+      -> the same check for the next PREFETCH_LOOKAHEAD listed restaurants
+
+A prefetched result is used at most once, within PREFETCH_TTL_S, and only for a
+call with the same arguments; anything else goes to the tool as usual. Calls
+still unused when the turn ends are cancelled and counted as waste.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import fast_json
+import metrics
+import tracing
+from tool_cache import normalize_arg
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("TOOL_PREFETCH", "1").lower() not in ("0", "false", "no", "off")
+PREFETCH_TTL_S = float(os.getenv("PREFETCH_TTL_S", "10"))
+PREFETCH_MAX_CALLS = int(os.getenv("PREFETCH_MAX_CALLS", "10"))  # per turn
+PREFETCH_LOOKAHEAD = int(os.getenv("PREFETCH_LOOKAHEAD", "3"))
+
+# Tools that may run without the model asking: no side effects
+PREFETCHABLE_TOOLS = {"check_availability_for_restaurant", "get_restaurant_details_by_id"}
+# Tools whose result lists the restaurants the flow goes on to check
+CANDIDATE_LIST_TOOLS = {"get_restaurants_in_area", "five_nearby_restaurants"}
+
+
+def call_key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    return (tool_name,) + tuple(sorted((k, normalize_arg(v)) for k, v in arguments.items()))
+
+
+class TurnPrefetcher:
+    def __init__(self, session, max_calls: int = PREFETCH_MAX_CALLS if PREFETCH_ENABLED else 0,
+                 ttl_s: float = PREFETCH_TTL_S, lookahead: int = PREFETCH_LOOKAHEAD):
+        self.session = session
+        self.max_calls = max_calls
+        self.ttl_s = ttl_s
+        self.lookahead = lookahead
+        self._calls: Dict[Tuple, Tuple[str, asyncio.Task, float]] = {}
+        self.candidates: List[int] = []  # restaurant ids from the last area / nearby search
+        self.checked = set()
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+
+    # ---------------- speculation ----------------
+
+    def _start(self, tool_name: str, arguments: Dict[str, Any]):
+        key = call_key(tool_name, arguments)
+        if key in self._calls or self.started >= self.max_calls or tool_name not in PREFETCHABLE_TOOLS:
+            return
+        task = asyncio.ensure_future(self.session.call_tool(tool_name, arguments, meta=tracing.inject()))
+        self._calls[key] = (tool_name, task, time.monotonic())
+        self.started += 1
+
+    def observe(self, tool_name: str, arguments: Dict[str, Any], raw_text: str, batch_size: int):
+        """Start the calls the flow is expected to make after this tool result."""
+        try:
+            payload = fast_json.loads(raw_text)
+        except ValueError:
+            return
+        if not isinstance(payload, dict) or not payload.get("success"):
+            return
+        data = payload.get("data")
+
+        if tool_name in CANDIDATE_LIST_TOOLS and isinstance(data, list):
+            self.candidates = [r["id"] for r in data if isinstance(r, dict) and "id" in r]
+            self.checked = set()
+
+        elif tool_name == "check_availability_for_restaurant" and isinstance(data, dict):
+            restaurant_id = data.get("restaurant_id", arguments.get("restaurant_id"))
+            self.checked.add(restaurant_id)
+            if data.get("is_available_for_requested_slot"):
+                self._start("get_restaurant_details_by_id", {"restaurant_id": restaurant_id})
+            # Checked one at a time: the next listed restaurants get the same check
+            if batch_size == 1:
+                upcoming = [rid for rid in self.candidates if rid not in self.checked][: self.lookahead]
+                for rid in upcoming:
+                    self._start(tool_name, {**arguments, "restaurant_id": rid})
+
+    # ---------------- use ----------------
+
+    def take(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """The prefetched call for exactly this tool call, if there is a fresh one."""
+        entry = self._calls.pop(call_key(tool_name, arguments), None)
+        if entry is None:
+            return None
+        _, task, started_at = entry
+        failed = task.done() and (task.cancelled() or task.exception() is not None)
+        if failed or time.monotonic() - started_at > self.ttl_s:
+            self._discard(tool_name, task)
+            return None
+        self.hits += 1
+        metrics.TOOL_PREFETCH.inc(tool=tool_name, outcome="hit")
+        return task
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]):
+        """session.call_tool, answered by a prefetched call when there is one."""
+        task = self.take(tool_name, arguments)
+        if task is not None:
+            try:
+                return await task
+            except Exception as e:
+                logger.warning(f"Prefetched {tool_name} failed ({e!r}); calling it again")
+        return await self.session.call_tool(tool_name, arguments, meta=tracing.inject())
+
+    def _discard(self, tool_name: str, task: asyncio.Task):
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()  # retrieved, so an unused failure is not reported as never retrieved
+        self.wasted += 1
+        metrics.TOOL_PREFETCH.inc(tool=tool_name, outcome="waste")
+
+    def close(self):
+        """Cancel what the turn did not use; call before the tool session closes."""
+        for tool_name, task, _ in self._calls.values():
+            self._discard(tool_name, task)
+        self._calls.clear()
+        if self.started:
+            logger.info(f"Prefetch: {self.started} started, {self.hits} used, {self.wasted} wasted")
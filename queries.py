@@ -0,0 +1,119 @@
+# queries.py
+"""
+The hot read queries of the MCP tools, built once as Core select() statements.
+
+Building an ORM Query per call costs more CPU than running it: the statement
+is constructed again, compiled through the ORM plugin (or looked up in the
+compiled cache by a freshly computed key), and every row becomes an ORM object
+registered in the session's identity map. The tools only read columns and turn
+them into dicts, so here:
+
+- each statement is a module-level constant over the mapped tables, with
+  bindparam() placeholders for the values, so its cache key and compiled form
+  are reused across calls
+- fetch_all / fetch_one execute it on the session's connection and return plain
+  Rows (attribute access like the ORM objects: row.name, row.table_no)
+
+Statements that take a list of ids use expanding parameters. Writes (booking,
+cancel, feedback) keep using the ORM.
+
+Compare with `python -m benchmarks.sql_statements`.
+"""
+from typing import Any, List, Optional
+
+from sqlalchemy import Integer, bindparam, exists, func, select
+
+from models import Feedback, Reservation, Restaurant, RestaurantTable
+
+restaurants = Restaurant.__table__
+restaurant_tables = RestaurantTable.__table__
+reservations = Reservation.__table__
+feedbacks = Feedback.__table__
+
+
+def fetch_all(db, statement, **params) -> List[Any]:
+    """Rows of a Core statement, run on the connection of the session `db`."""
+    return db.connection().execute(statement, params).all()
+
+
+def fetch_one(db, statement, **params) -> Optional[Any]:
+    return db.connection().execute(statement, params).first()
+
+
+# ----- Restaurants -----
+RESTAURANT_BY_ID = select(restaurants).where(restaurants.c.id == bindparam("restaurant_id"))
+
+# `pattern` is an ILIKE pattern, e.g. "%adyar%"
+RESTAURANTS_BY_NAME = (
+    select(restaurants)
+    .where(restaurants.c.name.ilike(bindparam("pattern")))
+    .limit(bindparam("limit", type_=Integer))
+)
+RESTAURANTS_BY_AREA = (
+    select(restaurants)
+    .where(restaurants.c.area.ilike(bindparam("pattern")))
+    .limit(bindparam("limit", type_=Integer))
+)
+FIRST_RESTAURANT_IN_AREA = (
+    select(restaurants)
+    .where(restaurants.c.area.ilike(bindparam("pattern")))
+    .order_by(restaurants.c.id)
+    .limit(1)
+)
+AREA_COORDINATES = (
+    select(restaurants.c.latitude, restaurants.c.longitude)
+    .where(restaurants.c.area.ilike(bindparam("pattern")))
+)
+RESTAURANTS_IN_BOX = (
+    select(restaurants)
+    .where(restaurants.c.latitude >= bindparam("min_lat"), restaurants.c.latitude <= bindparam("max_lat"))
+    .where(restaurants.c.longitude >= bindparam("min_lon"), restaurants.c.longitude <= bindparam("max_lon"))
+)
+
+# ----- Tables and reservations -----
+# Tables of a restaurant with no reservation overlapping [start_dt, end_dt)
+# (NOT EXISTS probe on ix_reservation_table_window)
+AVAILABLE_TABLES = (
+    select(restaurant_tables.c.id, restaurant_tables.c.table_no)
+    .where(restaurant_tables.c.restaurant_id == bindparam("restaurant_id"))
+    .where(~exists().where(
+        reservations.c.table_id == restaurant_tables.c.id,
+        reservations.c.end_dt > bindparam("start_dt"),
+        reservations.c.start_dt < bindparam("end_dt"),
+    ))
+)
+OVERLAPPING_RESERVATION_COUNT = (
+    select(func.count())
+    .select_from(reservations)
+    .where(reservations.c.table_id.in_(bindparam("table_ids", expanding=True)))
+    .where(reservations.c.end_dt > bindparam("start_dt"), reservations.c.start_dt < bindparam("end_dt"))
+)
+TABLE_IDS_OF_RESTAURANT = (
+    select(restaurant_tables.c.id)
+    .where(restaurant_tables.c.restaurant_id == bindparam("restaurant_id"))
+    .order_by(restaurant_tables.c.id)
+)
+TABLES_OF_RESTAURANTS = (
+    select(restaurant_tables.c.restaurant_id, restaurant_tables.c.id)
+    .where(restaurant_tables.c.restaurant_id.in_(bindparam("restaurant_ids", expanding=True)))
+    .order_by(restaurant_tables.c.restaurant_id, restaurant_tables.c.id)
+)
+RESERVATIONS_IN_WINDOW = (
+    select(reservations.c.table_id, reservations.c.start_dt, reservations.c.end_dt)
+    .where(reservations.c.table_id.in_(bindparam("table_ids", expanding=True)))
+    .where(reservations.c.end_dt > bindparam("start_dt"), reservations.c.start_dt < bindparam("end_dt"))
+)
+
+# ----- Feedback -----
+LATEST_5_USER_FEEDBACK = (
+    select(feedbacks)
+    .where(feedbacks.c.user_id == bindparam("user_id"))
+    .order_by(feedbacks.c.created_at.desc())
+    .limit(5)
+)
+LATEST_5_RESTAURANT_FEEDBACK = (
+    select(feedbacks)
+    .where(feedbacks.c.restaurant_id == bindparam("restaurant_id"))
+    .order_by(feedbacks.c.created_at.desc())
+    .limit(5)
+)
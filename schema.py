@@ -2,4 +2,6 @@ from pydantic import BaseModel
 from typing import Optional
 
 class SendMessageRequest(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+    # Returned by the first /chat/send; send it back to continue the conversation
+    conversation_id: Optional[str] = None
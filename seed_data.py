@@ -16,13 +16,19 @@ Deterministic seed script for the Restaurant Reservation demo.
     - feedbacks for one nearby restaurant matching user 1 preferences
 - Uses IST timezone and deterministic random seed.
 
+Seeding is an explicit command; API startup only seeds an empty database
+(see main.startup_event).
+
 Run:
-    python seed_data.py
+    python seed_data.py             # drop everything, recreate and seed
+    python seed_data.py --if-empty  # migrate, seed only when no restaurants exist
 """
+import argparse
 import random
 from datetime import datetime, timedelta, timezone, time
 from math import ceil
 from database import SessionLocal, engine
+from migrations import run_migrations
 from models import Base, Restaurant, RestaurantTable, User, Booking, Reservation, Feedback
 
 # IST timezone
@@ -68,12 +74,24 @@ def id2(n):
 def create_restaurant_name(word, area, rid):
     return f"GoodFoods {word} {area} {id2(rid)}"
 
-def seed_data():
+def has_seed_data() -> bool:
+    """True when the database already holds restaurants (i.e. was seeded or is live)."""
     db = SessionLocal()
     try:
-        # drop & recreate schema
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
+        return db.query(Restaurant.id).first() is not None
+    finally:
+        db.close()
+
+def seed_data(reset: bool = True):
+    db = SessionLocal()
+    try:
+        if reset:
+            # drop & recreate schema
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+        else:
+            # keep existing schema/data, only bring it up to date
+            run_migrations(engine)
 
         # --- Restaurants ---
         restaurants = []
@@ -186,7 +204,7 @@ def seed_data():
         db.flush()
         # allocate 1 table for booking 1 (choose table_no 1)
         t_row = db.query(RestaurantTable).filter_by(restaurant_id=1, table_no=1).first()
-        r1_res = Reservation(booking_id=b1.id, table_id=t_row.id, created_at=now_ist())
+        r1_res = Reservation(booking_id=b1.id, table_id=t_row.id, start_dt=b1.start_dt, end_dt=b1.end_dt, created_at=now_ist())
         db.add(r1_res)
 
         b2 = Booking(
@@ -203,7 +221,7 @@ def seed_data():
         db.flush()
         t_row2 = db.query(RestaurantTable).filter_by(restaurant_id=12).first()
         if t_row2:
-            db.add(Reservation(booking_id=b2.id, table_id=t_row2.id, created_at=now_ist()))
+            db.add(Reservation(booking_id=b2.id, table_id=t_row2.id, start_dt=b2.start_dt, end_dt=b2.end_dt, created_at=now_ist()))
 
         b3 = Booking(
             id=3,
@@ -220,7 +238,7 @@ def seed_data():
         # allocate table_no 2 for b3
         t_row3 = db.query(RestaurantTable).filter_by(restaurant_id=1, table_no=2).first()
         if t_row3:
-            db.add(Reservation(booking_id=b3.id, table_id=t_row3.id, created_at=now_ist()))
+            db.add(Reservation(booking_id=b3.id, table_id=t_row3.id, start_dt=b3.start_dt, end_dt=b3.end_dt, created_at=now_ist()))
 
         db.commit()
 
@@ -249,7 +267,7 @@ def seed_data():
             # assign table idx (if available)
             if idx < len(tables_r1):
                 tbl = tables_r1[idx]
-                db.add(Reservation(booking_id=bk.id, table_id=tbl.id, created_at=now_ist()))
+                db.add(Reservation(booking_id=bk.id, table_id=tbl.id, start_dt=bk.start_dt, end_dt=bk.end_dt, created_at=now_ist()))
         db.commit()
 
         # 3) Misc bookings across restaurants to simulate activity (few deterministic ones)
@@ -270,7 +288,7 @@ def seed_data():
             db.flush()
             tbl = db.query(RestaurantTable).filter_by(restaurant_id=rid).first()
             if tbl:
-                db.add(Reservation(booking_id=bk.id, table_id=tbl.id, created_at=now_ist()))
+                db.add(Reservation(booking_id=bk.id, table_id=tbl.id, start_dt=bk.start_dt, end_dt=bk.end_dt, created_at=now_ist()))
         db.commit()
 
         # --- Feedbacks ---
@@ -388,4 +406,16 @@ def seed_data():
         db.close()
 
 if __name__ == "__main__":
-    seed_data()
+    parser = argparse.ArgumentParser(description="Seed the demo database.")
+    parser.add_argument("--if-empty", action="store_true",
+                        help="do not drop anything; seed only when the database has no restaurants")
+    args = parser.parse_args()
+
+    if args.if_empty:
+        run_migrations(engine)
+        if has_seed_data():
+            print("Database already has data, skipping seed.")
+        else:
+            seed_data(reset=False)
+    else:
+        seed_data()
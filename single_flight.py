@@ -0,0 +1,66 @@
+# single_flight.py
+"""
+Single-flight coalescing for concurrent identical reads.
+
+When several callers ask for the same key at the same time, only the first one
+(the leader) runs the work; the others await the leader's result. Nothing is
+kept after the work finishes, which is the TTL cache's job (tool_cache.py);
+single-flight covers the window while the first query is still running, e.g. a
+dinner-time burst of identical availability checks arriving before any result
+is cached.
+
+The shared work runs in its own task, so a caller that is cancelled does not
+cancel it for the others. Exceptions are shared like results.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    def __init__(self, max_tracked_keys: int = 1000):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # per-key counters, least recently used keys dropped beyond max_tracked_keys
+        self._stats: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self.max_tracked_keys = max_tracked_keys
+        self.executed = 0
+        self.shared = 0
+
+    async def run(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Return fn(*args), sharing one execution among concurrent callers with the same key."""
+        task = self._inflight.get(key)
+        leader = task is None or task.done()
+        if leader:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+            self.executed += 1
+        else:
+            self.shared += 1
+        self._count(key, leader)
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """True when a call to run(key, ...) made now would join an execution already running."""
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def _count(self, key: Hashable, leader: bool):
+        row = self._stats.get(key)
+        if row is None:
+            row = self._stats[key] = [0, 0]
+            while len(self._stats) > self.max_tracked_keys:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        row[0 if leader else 1] += 1
+
+    def stats(self, top: int = 20) -> dict:
+        """Totals plus the keys that were coalesced the most: {key: {executed, shared}}."""
+        busiest = sorted(self._stats.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "shared": self.shared,
+            "keys": {repr(k): {"executed": e, "shared": s} for k, (e, s) in busiest},
+        }
@@ -0,0 +1,95 @@
+# tool_cache.py
+"""
+Shared TTL cache for read-only MCP tool results.
+
+Entries are keyed by tool name plus arguments, so identical questions
+from different users ("Adyar tonight at 8 for 4") are answered from memory while
+the entry is fresh. Entries can be tagged with a restaurant id; a booking or a
+cancellation for that restaurant drops its entries immediately.
+
+Each tag also has a generation number. A read records the generation before it
+queries the database and only stores its result if no invalidation happened in
+the meantime, so a slow read can never re-insert a result that predates a booking.
+
+The cache lives in the tool-server process: it is shared by every chat turn that
+process serves.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+def normalize_arg(value: Any) -> Hashable:
+    """
+    Key form of a tool argument: the value as the tool receives it, lists as tuples.
+    Strings are not trimmed or case-folded: the tools query with the raw argument,
+    so "Adyar  " and "Adyar" can have different answers.
+    """
+    if isinstance(value, list):
+        return tuple(normalize_arg(v) for v in value)
+    return value
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Optional[int]]]" = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(tool: str, args: tuple) -> Tuple:
+        return (tool,) + tuple(normalize_arg(a) for a in args)
+
+    def generation(self, tag: Optional[int]) -> int:
+        return self._generations.get(tag, 0) if tag is not None else 0
+
+    def get(self, key: Tuple):
+        """Return (True, value) for a fresh entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple, value: Any, ttl_s: float, tag: Optional[int] = None, generation: int = 0):
+        """Store `value`, unless `tag` was invalidated since `generation` was read."""
+        if ttl_s <= 0:
+            return
+        with self._lock:
+            if self.generation(tag) != generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl_s, value, tag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tag: int):
+        """Drop every entry tagged with `tag` (e.g. after a booking for that restaurant)."""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [k for k, (_, _, t) in self._entries.items() if t == tag]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
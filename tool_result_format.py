@@ -0,0 +1,102 @@
+# tool_result_format.py
+"""
+How tool results are written into the conversation the LLM reads.
+
+Every tool message is sent again with each later chat.completions call of the
+turn (and of later turns, up to MAX_MEMORY), so its size is paid many times.
+TOOL_RESULT_FORMAT selects the encoding:
+
+- json     the tool's text as returned (indented JSON)
+- compact  minified JSON without the fields the prompt never uses (TOOL_RESULT_DROP_FIELDS)
+- table    compact, plus lists of objects with the same keys written as
+           {"columns": [...], "rows": [[...], ...]} so keys appear once (default)
+
+The {"success", "data"/"error"} envelope and all key names are kept, so the
+prompt's references ("id" inside "data", "restaurant_id", ...) still apply.
+Results that are not JSON are passed through unchanged.
+"""
+import os
+from typing import Any
+
+import fast_json
+
+TOOL_RESULT_FORMAT = os.getenv("TOOL_RESULT_FORMAT", "table").lower()
+
+# Per tool: fields removed before the result reaches the LLM
+TOOL_RESULT_DROP_FIELDS = {
+    "get_restaurants_in_area": ("latitude", "longitude"),
+    "get_restaurants_by_partial_name": ("latitude", "longitude"),
+    "latest_5_restaurant_feedback": ("restaurant_id",),  # the restaurant asked about
+    "latest_5_user_feedback": ("user_id",),              # the user asked about
+}
+
+
+def _drop(value: Any, fields: tuple) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop(v, fields) for k, v in value.items() if k not in fields}
+    if isinstance(value, list):
+        return [_drop(v, fields) for v in value]
+    return value
+
+
+def _tabulate(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _tabulate(v) for k, v in value.items()}
+    if isinstance(value, list):
+        value = [_tabulate(v) for v in value]
+        if len(value) > 1 and all(isinstance(v, dict) for v in value):
+            columns = list(value[0])
+            if all(list(v) == columns for v in value[1:]):
+                return {"columns": columns, "rows": [list(v.values()) for v in value]}
+        return value
+    return value
+
+
+def format_tool_result(tool_name: str, raw_text: str, fmt: str = TOOL_RESULT_FORMAT) -> str:
+    """The text to put in the tool message for `raw_text` returned by `tool_name`."""
+    if fmt == "json":
+        return raw_text
+    try:
+        payload = fast_json.loads(raw_text)
+    except ValueError:
+        return raw_text
+    fields = TOOL_RESULT_DROP_FIELDS.get(tool_name)
+    if fields:
+        payload = _drop(payload, fields)
+    if fmt == "table":
+        payload = _tabulate(payload)
+    return fast_json.dumps(payload)
+
+
+# ----- Token counts -----
+_encoding = None
+
+
+def load_encoding():
+    """
+    Load the tiktoken encoding once. It may read or download a file, so call this at
+    startup (ai_client.warm_up) rather than on the event loop during a turn.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(os.getenv("TOKEN_ENCODING", "o200k_base"))
+        except Exception:  # not installed, or the encoding file cannot be fetched
+            _encoding = False
+    return _encoding
+
+
+def tokens_are_exact() -> bool:
+    """False when count_tokens falls back to the 4-characters-per-token estimate."""
+    return bool(load_encoding())
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in `text`: exact with tiktoken when it is installed and its encoding is
+    available, otherwise estimated at 4 characters per token.
+    """
+    if load_encoding():
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
@@ -0,0 +1,219 @@
+# tool_transport.py
+"""
+Tool transports other than a per-turn stdio child process. Both expose the parts
+of mcp.ClientSession the agent uses (initialize, list_tools, call_tool).
+
+- InProcessToolSession (MCP_TRANSPORT=inprocess) runs the FastMCP tools from
+  mcp_server.py directly on the caller's event loop: no subprocess, no JSON-RPC
+  framing and no stdio pipe. Arguments still go through FastMCP's validation and
+  results through its content conversion, so the agent and the LLM see the same
+  CallToolResult they would get over stdio. Use it when the agent and the tools
+  are deployed together.
+- HttpToolSession (MCP_TRANSPORT=http) keeps a pool of long-lived MCP sessions to
+  tool servers started with `python mcp_server.py --transport streamable-http`.
+
+stdio remains the default for running the tool server as its own process.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from mcp import ClientSession, types
+from mcp.server.fastmcp.exceptions import ToolError
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessToolSession:
+    def __init__(self, server=None):
+        if server is None:
+            # Imported on first use: loads the tools, database engine and caches into this process
+            from mcp_server import mcp as server
+        self.server = server
+        self._tools: Optional[types.ListToolsResult] = None
+
+    async def initialize(self):
+        return None
+
+    async def list_tools(self, *args, **kwargs) -> types.ListToolsResult:
+        # The tool set is fixed once mcp_server is imported
+        if self._tools is None:
+            self._tools = types.ListToolsResult(tools=await self.server.list_tools())
+        return self._tools
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        read_timeout_seconds: Optional[timedelta] = None,
+        progress_callback=None,
+        *,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> types.CallToolResult:
+        """
+        Run a tool like a tools/call request would. `meta` is accepted for interface
+        compatibility; trace context already flows through contextvars in-process.
+        """
+        try:
+            result = await self.server.call_tool(name, arguments or {})
+        except ToolError as e:
+            return types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
+        if isinstance(result, types.CallToolResult):
+            return result
+        if isinstance(result, tuple):
+            content, structured = result
+            return types.CallToolResult(content=list(content), structuredContent=structured)
+        if isinstance(result, dict):
+            # structured-only result: serialized the way the low-level server does it
+            text = fast_json.dumps(result, indent=True)
+            return types.CallToolResult(content=[types.TextContent(type="text", text=text)], structuredContent=result)
+        return types.CallToolResult(content=list(result))
+
+
+_session: Optional[InProcessToolSession] = None
+
+
+def get_in_process_session() -> InProcessToolSession:
+    """Process-wide session; tools are stateless per call, so one is shared by all turns."""
+    global _session
+    if _session is None:
+        _session = InProcessToolSession()
+    return _session
+
+
+# --------------------------- streamable HTTP ---------------------------
+
+class _PooledConnection:
+    """One MCP session over streamable HTTP, owned by a background task for its whole life."""
+
+    def __init__(self, url: str, timeout_s: float):
+        self.url = url
+        self.timeout_s = timeout_s
+        self.session: Optional[ClientSession] = None
+        self._ready = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        # anyio cancel scopes must be exited by the task that entered them, hence the owner task
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        from mcp.client.streamable_http import streamablehttp_client
+
+        try:
+            async with streamablehttp_client(self.url, timeout=self.timeout_s) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closed.wait()
+        except BaseException as e:  # surfaced to callers through ready()
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ready(self) -> ClientSession:
+        await self._ready.wait()
+        if self.session is None:
+            raise ConnectionError(f"MCP server {self.url} unavailable: {self._error!r}")
+        return self.session
+
+    @property
+    def alive(self) -> bool:
+        return not self._task.done()
+
+    async def close(self):
+        self._closed.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class HttpToolSession:
+    """
+    ClientSession-like facade over a pool of streamable-HTTP MCP sessions.
+
+    `size` sessions are opened round-robin across `urls` (tool-server replicas) on
+    first use and reused by every chat turn; each session multiplexes concurrent
+    calls over keep-alive HTTP connections.
+
+    A replica whose session cannot be set up is skipped for `down_s` and the call
+    goes to the next replica's session: nothing was sent yet, so this is safe for
+    any tool. A replica in its cooldown is still tried when no other one answers.
+    Calls that fail after they were sent are not retried, since tools such as
+    make_reservation_tool are not idempotent.
+    """
+
+    def __init__(self, urls: List[str], size: int = 4, timeout_s: float = 30.0, tools_ttl_s: float = 60.0,
+                 down_s: float = 5.0):
+        self.urls = urls
+        self.size = max(size, len(urls))
+        self.timeout_s = timeout_s
+        self.tools_ttl_s = tools_ttl_s
+        self.down_s = down_s
+        self._connections: List[Optional[_PooledConnection]] = [None] * self.size
+        self._down_until: Dict[str, float] = {}
+        self._next = itertools.count()
+        self._tools: Optional[types.ListToolsResult] = None
+        self._tools_at = 0.0
+
+    def _is_down(self, url: str) -> bool:
+        return self._down_until.get(url, 0.0) > time.monotonic()
+
+    async def _session(self) -> ClientSession:
+        start = next(self._next)
+        slots = [(start + i) % self.size for i in range(self.size)]
+        # Replicas in their cooldown go last (stable sort keeps the round-robin order)
+        slots.sort(key=lambda slot: self._is_down(self.urls[slot % len(self.urls)]))
+        failed, error = set(), None
+        for slot in slots:
+            url = self.urls[slot % len(self.urls)]
+            if url in failed:
+                continue
+            conn = self._connections[slot]
+            if conn is None or not conn.alive:
+                conn = _PooledConnection(url, self.timeout_s)
+                self._connections[slot] = conn
+            try:
+                return await conn.ready()
+            except ConnectionError as e:
+                self._connections[slot] = None
+                self._down_until[url] = time.monotonic() + self.down_s
+                failed.add(url)
+                error = e
+                logger.warning(f"{e}; skipping it for {self.down_s:.0f}s")
+        raise error
+
+    async def initialize(self):
+        await self._session()
+
+    async def list_tools(self, *args, **kwargs) -> types.ListToolsResult:
+        # Every replica serves the same tools; refresh now and then to pick up deploys
+        if self._tools is None or time.monotonic() - self._tools_at > self.tools_ttl_s:
+            self._tools = await (await self._session()).list_tools()
+            self._tools_at = time.monotonic()
+        return self._tools
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> types.CallToolResult:
+        return await (await self._session()).call_tool(name, arguments, *args, **kwargs)
+
+    async def close(self):
+        conns = [c for c in self._connections if c is not None]
+        self._connections = [None] * self.size
+        await asyncio.gather(*(c.close() for c in conns))
+
+
+_http_session: Optional[HttpToolSession] = None
+_http_session_loop = None
+
+
+def get_http_session(urls: List[str], size: int) -> HttpToolSession:
+    """Process-wide pool (rebuilt if the event loop changed, e.g. between asyncio.run calls)."""
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session_loop is not loop:
+        _http_session = HttpToolSession(urls, size)
+        _http_session_loop = loop
+    return _http_session
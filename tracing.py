@@ -0,0 +1,232 @@
+# tracing.py
+"""
+Span tracing for the agent loop, MCP tools and SQL statements.
+
+Selected with TRACE_EXPORTER:
+- none     (default) every span is a no-op; nothing is recorded
+- console  one line per finished span on stderr (stdout belongs to the MCP stdio transport)
+- json     one JSON object per finished span, appended to TRACE_FILE (default traces.jsonl)
+- otel     spans are created through the OpenTelemetry API (opentelemetry-api must be
+           installed; configure the SDK/exporter the usual OpenTelemetry way)
+
+Every span carries the request id of the chat turn that caused it. The id travels
+from ai_client.py to mcp_server.py in the `_meta` of each tools/call request
+(see inject()/continue_from()), so spans from both processes can be joined.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables from .env
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+SQL_STATEMENT_MAX_CHARS = 300
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    request_id: Optional[str]
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration_ms: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _OtelSpan:
+    """Gives OpenTelemetry spans the same `set(**attributes)` call as Span."""
+
+    def __init__(self, otel_span):
+        self._span = otel_span
+
+    def set(self, **attributes):
+        for key, value in attributes.items():
+            self._span.set_attribute(key, value)
+
+
+class _ConsoleExporter:
+    def export(self, s: Span):
+        attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+        print(f"[trace {s.request_id}] {s.name} {s.duration_ms:.2f}ms {s.status} {attrs}", file=sys.stderr)
+
+
+class _JsonExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, s: Span):
+        line = json.dumps(asdict(s), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+_exporter = None
+_otel_tracer = None
+if TRACE_EXPORTER == "console":
+    _exporter = _ConsoleExporter()
+elif TRACE_EXPORTER == "json":
+    _exporter = _JsonExporter(TRACE_FILE)
+elif TRACE_EXPORTER == "otel":
+    try:
+        from opentelemetry import trace as _otel_trace
+        _otel_tracer = _otel_trace.get_tracer("reservation-agent")
+    except ImportError:
+        logger.warning("TRACE_EXPORTER=otel but opentelemetry-api is not installed; tracing disabled")
+
+ENABLED = _exporter is not None or _otel_tracer is not None
+
+
+# --------------------------- request id ---------------------------
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def set_request_id(request_id: Optional[str] = None) -> str:
+    """Bind a request id (new one if None) to the current context and return it."""
+    request_id = request_id or new_request_id()
+    _request_id.set(request_id)
+    return request_id
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def inject() -> Dict[str, str]:
+    """Trace context to send along with an outgoing MCP request (`_meta`)."""
+    carrier = {}
+    if _request_id.get():
+        carrier["request_id"] = _request_id.get()
+    current = _current_span.get()
+    if current is not None:
+        carrier["parent_span_id"] = current.span_id
+    return carrier
+
+
+@contextmanager
+def continue_from(carrier: Optional[Dict[str, Any]]):
+    """Adopt the request id / parent span received from another process for the enclosed block."""
+    carrier = carrier or {}
+    rid_token = _request_id.set(carrier.get("request_id") or _request_id.get())
+    parent = None
+    if carrier.get("parent_span_id"):
+        parent = Span("remote", carrier.get("request_id"), carrier["parent_span_id"], None, time.time())
+    span_token = _current_span.set(parent) if parent else None
+    try:
+        yield
+    finally:
+        if span_token is not None:
+            _current_span.reset(span_token)
+        _request_id.reset(rid_token)
+
+
+# --------------------------- spans ---------------------------
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the enclosed block as a child of the current span. Yields the Span (or None when disabled)."""
+    if not ENABLED:
+        yield None
+        return
+
+    if _otel_tracer is not None:
+        with _otel_tracer.start_as_current_span(name) as otel_span:
+            s = _OtelSpan(otel_span)
+            s.set(request_id=_request_id.get() or "", **attributes)
+            yield s
+        return
+
+    parent = _current_span.get()
+    s = Span(
+        name=name,
+        request_id=_request_id.get(),
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start=time.time(),
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        s.duration_ms = round((time.perf_counter() - t0) * 1000, 3)
+        _current_span.reset(token)
+        _exporter.export(s)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the (sync or async) function inside a span named `name` (default: function name)."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --------------------------- SQLAlchemy ---------------------------
+
+def instrument_engine(engine):
+    """Record one `sql` span per statement executed on `engine` (sync Engine or AsyncEngine)."""
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        cm = span("sql", statement=" ".join(statement.split())[:SQL_STATEMENT_MAX_CHARS])
+        cm.__enter__()
+        conn.info.setdefault("_trace_spans", []).append(cm)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_trace_spans")
+        if stack:
+            stack.pop().__exit__(None, None, None)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        stack = exception_context.connection.info.get("_trace_spans") if exception_context.connection else None
+        if stack:
+            err = exception_context.original_exception
+            stack.pop().__exit__(type(err), err, err.__traceback__)